@@ -0,0 +1,258 @@
+"""Micro-benchmarks for the PDF side of the reader, over synthetic PDFs.
+
+Needs no network and no display (Qt runs on the offscreen platform):
+
+    python -m benchmarks.micro --json > run.json
+    python -m benchmarks.micro --save-baseline benchmarks/baselines/micro.json
+    python -m benchmarks.micro --compare benchmarks/baselines/micro.json
+
+With --compare the exit status is 1 when any benchmark's best time (least
+disturbed by other load on the machine) is slower than its baseline by more
+than the threshold (default x1.5, x2 for benchmarks under 2 ms; overridable
+per benchmark with a "threshold" key in the baseline file).
+"""
+from __future__ import annotations
+import argparse, json, os, platform, random, statistics, sys, tempfile, time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import fitz
+import numpy as np
+from PySide6 import QtCore, QtWidgets
+from pdf_voice_reader.model import thumbstore
+from pdf_voice_reader.model.chunkindex import ChunkIndex
+from pdf_voice_reader.model.pdfdoc import PDFDoc, render_cover
+from pdf_voice_reader.util import chunk_text
+from pdf_voice_reader.views.page import PageWidget
+
+DEFAULT_THRESHOLD = 1.5
+SHORT_MS, SHORT_THRESHOLD = 2.0, 2.0   # sub-2 ms benchmarks are noisier
+SCALES = (0.6, 1.0, 2.0)
+_WORDS = ("reader voice page chapter margin sentence paragraph library render "
+          "cover search index shadow window engine buffer").split()
+
+
+# ----- synthetic corpus -----
+def _lorem(rng: random.Random, n_words: int) -> str:
+    out = []
+    for k in range(n_words):
+        w = rng.choice(_WORDS)
+        out.append(w.capitalize() if k % 12 == 0 else w)
+        if k % 12 == 11:
+            out[-1] += "."
+    return " ".join(out)
+
+
+def make_corpus(root: Path, scale: float = 1.0, seed: int = 7) -> Dict[str, Path]:
+    """text_dense, image_heavy, huge (many pages) and mixed_sizes PDFs in ``root``."""
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    out: Dict[str, Path] = {}
+
+    doc = fitz.open()
+    for _ in range(max(2, int(40 * scale))):
+        page = doc.new_page()
+        page.insert_textbox(page.rect + (36, 36, -36, -36), _lorem(rng, 900), fontsize=8)
+    out["text_dense"] = root / "text_dense.pdf"; doc.save(str(out["text_dense"])); doc.close()
+
+    doc = fitz.open()
+    noise = np.random.default_rng(seed)
+    for _ in range(max(2, int(20 * scale))):
+        page = doc.new_page()
+        px = fitz.Pixmap(fitz.csRGB, 1200, 900, noise.integers(0, 255, 1200 * 900 * 3, dtype=np.uint8).tobytes(), False)
+        page.insert_image(page.rect + (36, 120, -36, -36), pixmap=px)
+        page.insert_text((36, 72), _lorem(rng, 12), fontsize=11)
+    out["image_heavy"] = root / "image_heavy.pdf"; doc.save(str(out["image_heavy"]), deflate=True); doc.close()
+
+    doc = fitz.open()
+    for k in range(max(10, int(3000 * scale))):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"{k + 1}. " + _lorem(rng, 30), fontsize=11)
+    out["huge"] = root / "huge.pdf"; doc.save(str(out["huge"])); doc.close()
+
+    doc = fitz.open()
+    sizes = [fitz.paper_size(p) for p in ("a4", "letter", "a3-l", "a6", "legal")]
+    for k in range(max(5, int(60 * scale))):
+        w, h = sizes[k % len(sizes)]
+        page = doc.new_page(width=w, height=h)
+        page.insert_textbox(page.rect + (24, 24, -24, -24), _lorem(rng, 200), fontsize=9)
+    out["mixed_sizes"] = root / "mixed_sizes.pdf"; doc.save(str(out["mixed_sizes"])); doc.close()
+    return out
+
+
+# ----- timing -----
+def bench(fn: Callable[[], object], ops: int = 1, repeat: int = 5) -> dict:
+    """Median/min wall time of ``fn`` over ``repeat`` runs; ``ops`` is how many
+    operations one call performs (for the throughput figure)."""
+    fn()   # warm-up: imports, font loading, first-call allocations
+    times: List[float] = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    med = statistics.median(times)
+    return {"median_ms": round(med * 1000, 3), "min_ms": round(min(times) * 1000, 3),
+            "ops": ops, "ops_per_s": round(ops / med, 1) if med > 0 else None, "repeat": repeat}
+
+
+def _fresh(path: Path) -> PDFDoc:
+    d = PDFDoc(path)
+    d.open()
+    return d
+
+
+def run(quick: bool = False, only: Optional[str] = None) -> dict:
+    QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv[:1])   # PageWidget needs one
+    tmp = Path(tempfile.mkdtemp(prefix="pdfvr-bench-"))
+    corpus = make_corpus(tmp / "corpus", scale=0.25 if quick else 1.0)
+    repeat = 3 if quick else 7
+    res: Dict[str, dict] = {}
+
+    def add(name: str, fn: Callable[[], object], ops: int = 1):
+        if only is None or only in name:
+            res[name] = bench(fn, ops, repeat)
+
+    for kind, path in corpus.items():
+        add(f"open/{kind}", lambda p=path: _fresh(p).close())
+
+    for kind in ("text_dense", "image_heavy", "mixed_sizes"):
+        doc = _fresh(corpus[kind])
+        pages = list(range(min(4, doc.page_count)))
+        for s in SCALES:
+            def render(doc=doc, s=s, pages=pages):
+                doc._pix_cache.clear()
+                for i in pages:
+                    doc.render_page(i, s)
+            add(f"render_page/{kind}@{s:g}", render, len(pages))
+
+    # fit-width while the window is dragged 100 px wider: nearby scales share rasters
+    doc = _fresh(corpus["text_dense"])
+    w0 = doc.page_size(0)[0]
+    def resize(doc=doc, w0=w0):
+        doc._pix_cache.clear()
+        for vw in range(900, 1000, 4):
+            doc.render_page(0, (vw - 60) / w0)
+    add("render_page/resize_sweep", resize, 25)
+
+    doc = _fresh(corpus["text_dense"])
+    pages = list(range(doc.page_count))
+    def words(doc=doc, pages=pages):
+        doc._words_cache.clear()
+        for i in pages:
+            doc.page_words(i)
+    def text(doc=doc, pages=pages):
+        doc._text_cache.clear()
+        for i in pages:
+            doc.page_text(i)
+    add("page_words/text_dense", words, len(pages))
+    add("page_text/text_dense", text, len(pages))
+
+    big = " ".join(doc.page_text(i) for i in pages)
+    add("chunk_text/text_dense", lambda: chunk_text(big), max(1, len(big) // 1000))   # ops = kchars
+
+    # reading queue with its chunk -> (page, words) index, then word -> chunk lookups
+    page_words = [[w for *_, w in doc.page_words(i)] for i in pages]
+    def build(page_words=page_words):
+        index = ChunkIndex()
+        for i, ws in enumerate(page_words):
+            index.add_page(i, ws)
+        return index
+    add("chunk_index/build", build, max(1, sum(map(len, page_words)) // 1000))   # ops = kwords
+    index, rng = build(), random.Random(2)
+    probes = [(p, rng.randrange(max(1, len(page_words[p])))) for p in rng.choices(pages, k=1000)]
+    add("chunk_index/chunk_at", lambda: [index.chunk_at(p, w) for p, w in probes], len(probes))
+
+    pw = PageWidget(doc, 0)
+    pw.scale_for_words = 1.5
+    w, h = doc.page_size(0)
+    rng = random.Random(1)
+    points = [QtCore.QPointF(rng.uniform(0, w * 1.5), rng.uniform(0, h * 1.5)) for _ in range(200)]
+    doc.page_words(0)
+    add("nearest_word_index/text_dense", lambda: [pw._nearest_word_index(p) for p in points], len(points))
+
+    # covers, against a throwaway thumbnail store: cold renders, then cached reads
+    covers = list(corpus.values())
+    thumbstore._STORE = thumbstore.ThumbStore(tmp / "thumbs.sqlite3")
+    def cold():
+        thumbstore._STORE = thumbstore.ThumbStore(tmp / f"thumbs-{time.perf_counter_ns()}.sqlite3")
+        for p in covers:
+            render_cover(p, 200)
+    def warm():
+        for p in covers:
+            render_cover(p, 200)
+    add("cover_thumb/cold", cold, len(covers))
+    add("cover_thumb/warm", warm, len(covers))
+    thumbstore._STORE = None
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pymupdf": getattr(fitz, "VersionBind", "?"),
+            "quick": quick,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": res,
+    }
+
+
+def compare(run_: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> List[dict]:
+    """One row per benchmark present in both; ``regressed`` marks slowdowns
+    beyond the (per-benchmark or global) threshold."""
+    rows = []
+    for name, cur in run_["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        limit = base.get("threshold", threshold)
+        ratio = cur["min_ms"] / base["min_ms"] if base["min_ms"] else 1.0
+        rows.append({"name": name, "baseline_ms": base["min_ms"], "min_ms": cur["min_ms"],
+                     "ratio": round(ratio, 3), "threshold": limit, "regressed": ratio > limit})
+    return rows
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--quick", action="store_true", help="smaller corpus, fewer repeats")
+    ap.add_argument("--only", help="run benchmarks whose name contains this")
+    ap.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    ap.add_argument("--save-baseline", metavar="PATH", help="store this run as a baseline")
+    ap.add_argument("--compare", metavar="PATH", help="compare against a stored baseline")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                    help="allowed slowdown ratio before a benchmark counts as regressed")
+    args = ap.parse_args(argv)
+
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    if baseline and baseline.get("meta", {}).get("quick", False) != args.quick:
+        ap.error("the baseline was recorded %s --quick; run the same way to compare"
+                 % ("with" if args.quick is False else "without"))
+    res = run(args.quick, args.only)
+    rows = []
+    if baseline:
+        rows = compare(res, baseline, args.threshold)
+        res["comparison"] = rows
+    if args.save_baseline:
+        for r in res["results"].values():
+            if r["min_ms"] < SHORT_MS:
+                r["threshold"] = SHORT_THRESHOLD
+        Path(args.save_baseline).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save_baseline).write_text(json.dumps(res, indent=2) + "\n")
+    if args.json:
+        print(json.dumps(res, indent=2))
+    else:
+        for name, r in res["results"].items():
+            print(f"{name:>36}: {r['median_ms']:10.3f} ms  {r['ops_per_s'] or 0:10.1f} ops/s")
+        for r in rows:
+            flag = "REGRESSED" if r["regressed"] else "ok"
+            print(f"{r['name']:>36}: x{r['ratio']:.2f} vs baseline (limit x{r['threshold']:.2f}) {flag}")
+    return 1 if any(r["regressed"] for r in rows) else 0
+
+
+if __name__ == "__main__":
+    status = main()
+    # skip interpreter teardown: Qt/MuPDF objects finalized after the
+    # QApplication can abort there, which would mask the comparison result
+    sys.stdout.flush(); sys.stderr.flush()
+    os._exit(status)
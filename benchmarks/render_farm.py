@@ -0,0 +1,82 @@
+"""Render throughput of the process-pool renderer against in-process rendering.
+
+    python -m benchmarks.render_farm --workers 1 2 4 8 --json
+"""
+from __future__ import annotations
+import argparse, json, os, sys, tempfile, time
+from pathlib import Path
+from typing import List
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6 import QtCore, QtWidgets
+from pdf_voice_reader.model.pdfdoc import PDFDoc
+from pdf_voice_reader.model.renderfarm import RenderFarm
+from benchmarks.micro import make_corpus
+
+
+def in_process(path: Path, pages: List[int], level: float) -> float:
+    doc = PDFDoc(path)
+    doc.open()
+    t = time.perf_counter()
+    for i in pages:
+        doc._rasterize(i, level)
+    dt = time.perf_counter() - t
+    doc.close()
+    return len(pages) / dt
+
+
+def farm(path: Path, pages: List[int], level: float, workers: int) -> float:
+    f = RenderFarm(workers)
+    f.start()
+    loop = QtCore.QEventLoop()
+    left = set(pages)
+
+    def got(_path, page, _level, _img):
+        left.discard(page)
+        if not left:
+            loop.quit()
+    f.rendered.connect(got)
+    # warm-up: spawn, import MuPDF and open the document in every worker
+    for k in range(workers):
+        f.request(str(path), k % len(pages), level * 0.5)
+    while f.pending:
+        QtCore.QCoreApplication.processEvents()
+        time.sleep(0.005)
+    t = time.perf_counter()
+    for i in pages:
+        f.request(str(path), i, level)
+    loop.exec()
+    dt = time.perf_counter() - t
+    f.shutdown()
+    return len(pages) / dt
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    ap.add_argument("--level", type=float, default=2.0, help="render scale (device px per pt)")
+    ap.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = ap.parse_args(argv)
+
+    QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv[:1])
+    tmp = Path(tempfile.mkdtemp(prefix="pdfvr-farm-"))
+    path = make_corpus(tmp, scale=1.0)["image_heavy"]
+    pages = list(range(20))
+    res = {"cpus": os.cpu_count(), "level": args.level,
+           "in_process_pages_per_s": round(in_process(path, pages, args.level), 1), "farm": {}}
+    for n in sorted(set(args.workers)):
+        res["farm"][n] = round(farm(path, pages, args.level, n), 1)
+    if args.json:
+        print(json.dumps(res, indent=2))
+    else:
+        print(f"{'in-process':>14}: {res['in_process_pages_per_s']:8.1f} pages/s")
+        for n, rate in res["farm"].items():
+            print(f"{f'{n} workers':>14}: {rate:8.1f} pages/s")
+    return 0
+
+
+if __name__ == "__main__":
+    status = main()
+    sys.stdout.flush(); sys.stderr.flush()
+    os._exit(status)   # see benchmarks/micro.py
@@ -0,0 +1,154 @@
+"""Reading-pipeline benchmark for AppController on the stand-in TTS backend.
+
+Needs neither piper, aplay nor an audio device:
+
+    python -m benchmarks.tts_pipeline --rtf 0.3 --chunks 6 --json
+"""
+from __future__ import annotations
+import argparse, json, statistics, sys, time
+from typing import List
+import numpy as np
+from PySide6 import QtCore
+from pdf_voice_reader.backends import NullSink, StandInSynthesizer
+from pdf_voice_reader.controller import AppController
+from pdf_voice_reader.tts import PiperEngine
+from pdf_voice_reader.util import chunk_text
+
+
+class RecordingSink(NullSink):
+    """Null sink that models a device clock and records when it starves."""
+
+    def __init__(self):
+        super().__init__(realtime=True)
+        self.sample_rate = 22050
+        self.first_write: float | None = None
+        self.writes: List[float] = []
+        self.closes: List[float] = []
+        self.gaps: List[float] = []
+        self._clock_end: float | None = None
+
+    def open(self, sample_rate: int) -> None:
+        self.sample_rate = sample_rate
+        self._clock_end = None
+
+    def write(self, pcm: np.ndarray) -> None:
+        now = time.monotonic()
+        if self.first_write is None:
+            self.first_write = now
+        if self._clock_end is not None and now > self._clock_end:
+            self.gaps.append(now - self._clock_end)
+        self._clock_end = max(now, self._clock_end or now) + len(pcm) / self.sample_rate
+        self.writes.append(now)
+        super().write(pcm)
+
+    def close(self) -> None:
+        self.closes.append(time.monotonic())
+        self._clock_end = None
+
+
+def sample_text(n_sentences: int) -> str:
+    words = "the reader keeps every page of this long book close while the voice moves on".split()
+    out = []
+    for k in range(n_sentences):
+        n = 8 + k % 9
+        out.append(" ".join(words[(k + j) % len(words)] for j in range(n)).capitalize() + ".")
+    return " ".join(out)
+
+
+class _Driver(QtCore.QObject):
+    """Issues pause/resume from the GUI thread once the first chunk has played."""
+
+    def __init__(self, ctl: AppController):
+        super().__init__()
+        self.ctl = ctl
+        self.marks: dict = {}
+
+    @QtCore.Slot(int)
+    def on_progress(self, i: int):
+        if i == 1:
+            QtCore.QTimer.singleShot(250, self.pause)
+
+    @QtCore.Slot(str)
+    def on_error(self, msg: str):
+        self.marks.setdefault("error", msg)
+
+    def pause(self):
+        self.marks["pause"] = time.monotonic()
+        self.ctl.pause()
+        QtCore.QTimer.singleShot(300, self.resume)
+
+    def resume(self):
+        self.marks["resume"] = time.monotonic()
+        self.ctl.resume()
+
+
+def _ms(v: float | None) -> float | None:
+    return None if v is None else round(v * 1000, 2)
+
+
+def run(rtf: float = 0.3, chunks: int = 6, wpm: int = 170, chunk_len: int = 120,
+        timeout: float = 300.0) -> dict:
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication(sys.argv[:1])
+    sink = RecordingSink()
+    ctl = AppController(PiperEngine(synth=StandInSynthesizer(rtf=rtf), sink=sink))
+    ctl.wpm = wpm
+    queue = chunk_text(sample_text(chunks * 8), target_len=chunk_len)[:chunks]
+
+    driver = _Driver(ctl)
+    done = QtCore.QEventLoop(app)
+    ctl.engine.finished.connect(done.quit, QtCore.Qt.QueuedConnection)
+    ctl.engine.error.connect(driver.on_error)
+    ctl.engine.progress.connect(driver.on_progress)
+    QtCore.QTimer.singleShot(int(timeout * 1000), done.quit)
+    t_start = time.monotonic()
+    ctl.start_queue(queue)
+    done.exec()
+    t_end = time.monotonic()
+    ctl.stop()
+    ctl.engine.wait()
+    marks = driver.marks
+
+    pause_latency = resume_latency = None
+    if "pause" in marks:
+        after = [t for t in sink.writes + sink.closes if t >= marks["pause"]]
+        pause_latency = (min(after) if after else marks["pause"]) - marks["pause"]
+    if "resume" in marks:
+        after = [t for t in sink.writes if t >= marks["resume"]]
+        resume_latency = (min(after) - marks["resume"]) if after else None
+    audio_s = sink.samples / sink.sample_rate
+    return {
+        "chunks": len(queue),
+        "chunk_len": chunk_len,
+        "rtf": rtf,
+        "wpm": wpm,
+        "error": marks.get("error"),
+        "wall_s": round(t_end - t_start, 3),
+        "audio_s": round(audio_s, 3),
+        "time_to_first_audio_ms": _ms(sink.first_write - t_start if sink.first_write else None),
+        "gap_count": len(sink.gaps),
+        "gap_total_ms": _ms(sum(sink.gaps)),
+        "gap_max_ms": _ms(max(sink.gaps) if sink.gaps else 0.0),
+        "gap_median_ms": _ms(statistics.median(sink.gaps) if sink.gaps else 0.0),
+        "pause_latency_ms": _ms(pause_latency),
+        "resume_latency_ms": _ms(resume_latency),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rtf", type=float, default=0.3, help="stand-in synthesis real-time factor")
+    ap.add_argument("--chunks", type=int, default=6)
+    ap.add_argument("--chunk-len", type=int, default=120, help="chunk_text target length")
+    ap.add_argument("--wpm", type=int, default=170)
+    ap.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = ap.parse_args(argv)
+    res = run(args.rtf, args.chunks, args.wpm, args.chunk_len)
+    if args.json:
+        print(json.dumps(res, indent=2))
+    else:
+        for k, v in res.items():
+            print(f"{k:>24}: {v}")
+
+
+if __name__ == "__main__":
+    main()
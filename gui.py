@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
-from pdf_voice_reader.app import main
 
 if __name__ == "__main__":
+    # imported here: spawned pool workers re-run this file as __mp_main__ and
+    # would otherwise load Qt and every view before doing any work
+    from pdf_voice_reader.app import main
     main()
@@ -0,0 +1,19 @@
+"""``python -m pdf_voice_reader`` starts the GUI; ``... read book.pdf`` the
+terminal reader and ``... daemon serve|submit|status`` the synthesis daemon."""
+import sys
+
+
+def main() -> int:
+    if sys.argv[1:2] == ["read"]:
+        # keep PySide out of the terminal reader entirely
+        from .cli import main as read
+        return read(sys.argv[2:])
+    if sys.argv[1:2] == ["daemon"]:
+        from .daemon import main as daemon
+        return daemon(sys.argv[2:])
+    from .app import main as gui
+    return gui() or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,48 @@
 from __future__ import annotations
-import sys
+import os, sys
+from pathlib import Path
+from .startup import profile, enable_from
 from PySide6 import QtCore, QtWidgets
+from .tracing import tracer, TRACE_ENV
+from .watchdog import StallWatchdog, log as stall_log
 from .views.main_window import MainWindow
 from .config import APP_NAME
 
+
+class _FirstPaint(QtCore.QObject):
+    """Notes the first paint of any widget, then starts the deferred work."""
+    def __init__(self, window: MainWindow):
+        super().__init__(window)
+        self.window = window
+
+    def eventFilter(self, obj, ev):
+        if ev.type() == QtCore.QEvent.Paint:
+            QtWidgets.QApplication.instance().removeEventFilter(self)
+            profile.painted()
+            QtCore.QTimer.singleShot(0, self.window.finish_startup)
+        return False
+
+
 def main():
+    argv = enable_from(sys.argv)
+    profile.mark("imports")
+    trace_to = os.environ.get(TRACE_ENV)
+    if trace_to:
+        tracer.start()
     QtWidgets.QApplication.setAttribute(QtCore.Qt.AA_UseHighDpiPixmaps)
-    app = QtWidgets.QApplication(sys.argv)
+    app = QtWidgets.QApplication(argv)
     app.setStyle("Fusion")
+    if trace_to:
+        app.aboutToQuit.connect(lambda: tracer.export(Path(trace_to)))
+    profile.mark("qt init")
+    # only the frame is built here; library, voices and fitz follow the first paint
     w = MainWindow()
     w.setWindowTitle(APP_NAME)
+    profile.mark("window built")
+    app.installEventFilter(_FirstPaint(w))
+    watchdog = StallWatchdog(parent=w)
+    w.watchdog = watchdog
+    watchdog.start()
+    app.aboutToQuit.connect(lambda: watchdog.stalls and stall_log.warning(watchdog.report()))
     w.showMaximized()
     sys.exit(app.exec())
@@ -0,0 +1,91 @@
+from __future__ import annotations
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class TimeStretcher:
+    """Streaming pitch-preserving time-stretch (WSOLA) over one mono int16 clip.
+
+    ``speed`` > 1 consumes input faster than real time (shorter audio) and may
+    change between calls to :meth:`read`, so rate changes apply per buffer.
+    """
+
+    def __init__(self, pcm: np.ndarray, sample_rate: int, start: int = 0,
+                 frame_ms: float = 40.0, tol_ms: float = 8.0):
+        n = max(64, int(sample_rate * frame_ms / 1000) // 2 * 2)
+        self.n = n
+        self.hop = n // 2
+        self.tol = max(1, int(sample_rate * tol_ms / 1000))
+        self.length = int(len(pcm))
+        # periodic Hann: 50% overlapped frames sum to exactly 1
+        self._win = np.hanning(n + 1)[:n].astype(np.float32)
+        self._pad = n + 2 * self.tol
+        z = np.zeros(self._pad, dtype=np.float32)
+        self._x = np.concatenate([z, pcm.astype(np.float32), z, z])
+        self.seek(start)
+
+    # ----- position -----
+    @property
+    def position(self) -> int:
+        """Input sample the next output buffer starts from."""
+        return min(self.length, int(round(self.pos)))
+
+    @property
+    def done(self) -> bool:
+        return self.pos >= self.length and self._tail is None
+
+    def seek(self, sample: int) -> None:
+        s = max(0, min(int(sample), self.length))
+        self.pos = float(s)
+        # pretend a frame started one hop earlier so output resumes exactly at s
+        self._prev = s - self.hop
+        self._tail = self._seg(s, self.hop) * self._win[self.hop:]
+
+    # ----- synthesis -----
+    def _seg(self, start: int, length: int) -> np.ndarray:
+        o = self._pad + start
+        return self._x[o:o + length]
+
+    def read(self, n_out: int, speed: float = 1.0) -> np.ndarray:
+        """Return about ``n_out`` output samples (whole hops) as int16."""
+        if self._tail is None:
+            return np.zeros(0, dtype=np.int16)
+        hop, tol = self.hop, self.tol
+        speed = max(0.25, min(4.0, float(speed)))
+        out = []
+        for _ in range(max(1, -(-n_out // hop))):
+            if self.pos >= self.length:
+                out.append(self._tail)
+                self._tail = None
+                break
+            nominal = int(round(self.pos))
+            natural = self._prev + hop
+            if speed == 1.0 and abs(nominal - natural) <= tol:
+                start = natural   # plain overlap-add: exact reconstruction
+            else:
+                # pick the candidate around the nominal position that best continues
+                # the previous frame (vectorized over all offsets in +-tol)
+                ref = self._seg(natural, hop)
+                lo = max(-hop, nominal - tol)
+                cands = sliding_window_view(self._seg(lo, 2 * tol + hop), hop)
+                start = lo + int(np.argmax(cands @ ref))
+            frame = self._seg(start, self.n) * self._win
+            out.append(self._tail + frame[:hop])
+            self._tail = frame[hop:]
+            self._prev = start
+            self.pos += hop * speed
+        y = np.concatenate(out) if out else np.zeros(0, dtype=np.float32)
+        return np.clip(y, -32768, 32767).astype(np.int16)
+
+
+def quiet_point(pcm: np.ndarray, sample: int, sample_rate: int,
+                radius_ms: float = 150.0, frame_ms: float = 10.0) -> int:
+    """Quietest sample near ``sample`` (a word/sentence gap), for landing seeks."""
+    r = int(sample_rate * radius_ms / 1000)
+    w = max(1, int(sample_rate * frame_ms / 1000))
+    lo, hi = max(0, sample - r), min(len(pcm), sample + r)
+    if hi - lo <= w:
+        return max(0, min(int(sample), len(pcm)))
+    e = np.concatenate([[0.0], np.cumsum(pcm[lo:hi].astype(np.float64) ** 2)])
+    energy = e[w:] - e[:-w]
+    return lo + int(np.argmin(energy)) + w // 2
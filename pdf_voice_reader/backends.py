@@ -0,0 +1,226 @@
+from __future__ import annotations
+import os, subprocess, threading, time, wave, zlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional
+import numpy as np
+from .util import ensure_cmd, validate_piper_model, piper_sample_rate
+
+
+def _terminate(proc: Optional[subprocess.Popen], grace: float = 0.25) -> None:
+    if proc and proc.poll() is None:
+        try:
+            proc.terminate()
+            t0 = time.time()
+            while proc.poll() is None and time.time() - t0 < grace:
+                time.sleep(0.01)
+            if proc.poll() is None:
+                proc.kill()
+        except Exception:
+            pass
+
+
+# ---------------- synthesis ----------------
+
+class Synthesizer(ABC):
+    """Turns one chunk of text into mono int16 PCM at ``sample_rate``."""
+    sample_rate: int = 22050
+
+    def set_model(self, model: str) -> None:
+        pass
+
+    def check(self) -> None:
+        """Raise if the backend cannot run (missing binary, no model, ...)."""
+
+    @abstractmethod
+    def synthesize(self, text: str, length_scale: float) -> np.ndarray:
+        ...
+
+    def cancel(self) -> None:
+        """Abort an in-flight :meth:`synthesize` from another thread."""
+
+
+class PiperSynthesizer(Synthesizer):
+    def __init__(self):
+        self.model_path: Optional[str] = None
+        self._proc: Optional[subprocess.Popen] = None
+
+    def set_model(self, model: str) -> None:
+        validate_piper_model(model)
+        self.model_path = model
+        self.sample_rate = piper_sample_rate(model)
+
+    def check(self) -> None:
+        ensure_cmd("piper")
+        if not self.model_path:
+            raise RuntimeError("No Piper model selected")
+
+    def synthesize(self, text: str, length_scale: float) -> np.ndarray:
+        proc = subprocess.Popen(
+            ["piper", "-m", os.path.expanduser(self.model_path), "--length_scale", f"{length_scale:.3f}",
+             "--output_raw"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        self._proc = proc
+        try:
+            out, err = proc.communicate(text.encode("utf-8"))
+        finally:
+            self._proc = None
+        if proc.returncode != 0:
+            raise RuntimeError(err.decode(errors="ignore") or "piper failed")
+        return np.frombuffer(out, dtype=np.int16)
+
+    def cancel(self) -> None:
+        _terminate(self._proc)
+
+
+def default_synthesizer() -> Synthesizer:
+    """Piper in-process, or the synthesis daemon when PDF_VOICE_READER_DAEMON is set."""
+    from .daemon import DaemonSynthesizer, daemon_socket_from_env
+    sock = daemon_socket_from_env()
+    return DaemonSynthesizer(sock) if sock else PiperSynthesizer()
+
+
+class StandInSynthesizer(Synthesizer):
+    """Deterministic offline stand-in for Piper (benchmarks, load tests).
+
+    Every word becomes a short tone whose pitch is derived from the word, with
+    durations that follow ``length_scale`` like a real voice. ``rtf`` is the
+    real-time factor: producing 1 s of audio takes ``rtf`` seconds.
+    """
+    CHARS_PER_SEC = 15.0
+
+    def __init__(self, rtf: float = 0.2, sample_rate: int = 22050):
+        self.rtf = float(rtf)
+        self.sample_rate = int(sample_rate)
+        self._cancel = threading.Event()
+
+    def synthesize(self, text: str, length_scale: float) -> np.ndarray:
+        self._cancel.clear()
+        t0 = time.monotonic()
+        sr = self.sample_rate
+        words = text.split()
+        lens = np.array([len(w) + 1 for w in words] or [1], dtype=np.float64)
+        n = np.maximum(1, (lens / self.CHARS_PER_SEC * length_scale * sr).astype(np.int64))
+        freqs = np.array([180 + zlib.crc32(w.encode("utf-8")) % 220 for w in words] or [0], dtype=np.float64)
+        f = np.repeat(freqs, n)
+        # position inside each word, for a short fade in/out per word
+        k = np.arange(int(n.sum())) - np.repeat(np.cumsum(n) - n, n)
+        env = np.minimum(1.0, np.minimum(k, np.repeat(n, n) - k) / (0.01 * sr))
+        pcm = (6000 * env * np.sin(2 * np.pi * f * np.arange(len(f)) / sr)).astype(np.int16)
+        remaining = len(pcm) / sr * self.rtf - (time.monotonic() - t0)
+        if remaining > 0 and self._cancel.wait(remaining):
+            raise RuntimeError("synthesis cancelled")
+        return pcm
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+
+# ---------------- audio output ----------------
+
+class AudioSink(ABC):
+    """Consumes mono int16 PCM. ``realtime`` sinks are paced by the engine."""
+    realtime: bool = True
+
+    def check(self) -> None:
+        pass
+
+    def open(self, sample_rate: int) -> None:
+        pass
+
+    @abstractmethod
+    def write(self, pcm: np.ndarray) -> None:
+        ...
+
+    def close(self) -> None:
+        """Stop now, dropping anything still buffered."""
+
+    def drain(self, should_abort=lambda: False) -> None:
+        """Let buffered audio finish, then close."""
+        self.close()
+
+
+class AplaySink(AudioSink):
+    def __init__(self, buffer_ms: int = 160):
+        self.buffer_ms = buffer_ms
+        self._proc: Optional[subprocess.Popen] = None
+
+    def check(self) -> None:
+        ensure_cmd("aplay")
+
+    def open(self, sample_rate: int) -> None:
+        if self._proc and self._proc.poll() is None:
+            return
+        self._proc = subprocess.Popen(
+            ["aplay", "-q", "-t", "raw", "-f", "S16_LE", "-c", "1", "-r", str(sample_rate),
+             f"--buffer-time={self.buffer_ms * 1000}", "-"],
+            stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+
+    def write(self, pcm: np.ndarray) -> None:
+        proc = self._proc
+        try:
+            proc.stdin.write(pcm.tobytes())
+            proc.stdin.flush()
+        except Exception:
+            err = (proc.stderr.read().decode(errors="ignore") if proc and proc.stderr else "")
+            raise RuntimeError(err or "aplay failed")
+
+    def close(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc and proc.poll() is None:
+            try:
+                proc.kill()
+            except Exception:
+                pass
+
+    def drain(self, should_abort=lambda: False) -> None:
+        proc, self._proc = self._proc, None
+        if proc and proc.poll() is None:
+            try:
+                proc.stdin.close()
+                while proc.poll() is None and not should_abort():
+                    time.sleep(0.01)
+            except Exception:
+                pass
+            _terminate(proc, 0)
+
+
+class NullSink(AudioSink):
+    """Discards audio; as a realtime sink it still paces playback like a device."""
+
+    def __init__(self, realtime: bool = True):
+        self.realtime = realtime
+        self.samples = 0
+
+    def write(self, pcm: np.ndarray) -> None:
+        self.samples += len(pcm)
+
+
+class WavFileSink(AudioSink):
+    """Writes everything played to one WAV file, as fast as it is produced."""
+    realtime = False
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._wav: Optional[wave.Wave_write] = None
+
+    def open(self, sample_rate: int) -> None:
+        if self._wav is None:
+            self._wav = wave.open(str(self.path), "wb")
+            self._wav.setnchannels(1)
+            self._wav.setsampwidth(2)
+            self._wav.setframerate(sample_rate)
+
+    def write(self, pcm: np.ndarray) -> None:
+        self._wav.writeframes(pcm.astype("<i2").tobytes())
+
+    def close(self) -> None:
+        # keep the file open across pause/resume; finalize on drain
+        pass
+
+    def drain(self, should_abort=lambda: False) -> None:
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
@@ -0,0 +1,193 @@
+"""Terminal reader: ``python -m pdf_voice_reader read book.pdf --from-page 40``.
+
+Same text extraction and chunking as the GUI, spoken by the Qt-free
+ReadingEngine; nothing here imports PySide. Keys: space pause/resume,
+left/right sentence back/forward, +/- speed, q quit.
+"""
+from __future__ import annotations
+import argparse, json, sys, threading
+from pathlib import Path
+from typing import List, Optional
+from .config import STATE_FILE
+from .engine import ReadingEngine
+from .model.pdftext import TextDoc
+from .util import chunk_text, scan_voice_models
+
+WPM_MIN, WPM_MAX, WPM_STEP = 100, 260, 10   # the GUI slider's range
+
+
+def _last_state() -> dict:
+    try:
+        return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def _pick_voice(arg: Optional[str], last: Optional[str]) -> Optional[str]:
+    """A model path, a name fragment of an installed voice, or the GUI's last voice."""
+    if arg and Path(arg).expanduser().is_file():
+        return str(Path(arg).expanduser())
+    voices = scan_voice_models()
+    if arg:
+        return next((v for v in voices if arg.lower() in Path(v).name.lower()), None)
+    if last and Path(last).expanduser().is_file():
+        return last
+    return voices[0] if voices else None
+
+
+class TerminalReader:
+    def __init__(self, doc: TextDoc, engine: ReadingEngine, start_page: int):
+        self.doc, self.engine = doc, engine
+        self.chunks: List[str] = []
+        self.pages: List[int] = []   # page of each chunk
+        self.error: Optional[str] = None
+        self.paused = False
+        self._next_page = start_page
+        self._quit = False
+
+    def load(self) -> bool:
+        """Queue the first page with text; the rest is extracted in the background."""
+        while self._next_page < self.doc.page_count and not self.chunks:
+            self._add_page(self._next_page)
+            self._next_page += 1
+        if not self.chunks:
+            return False
+        self.engine.set_queue(self.chunks, 0)
+        threading.Thread(target=self._extract, name="text-extract", daemon=True).start()
+        return True
+
+    def _add_page(self, i: int) -> List[str]:
+        cs = chunk_text(self.doc.page_text(i))
+        self.pages.extend([i] * len(cs))
+        self.chunks.extend(cs)
+        return cs
+
+    def _extract(self):
+        # far ahead of speech: a page takes milliseconds, a chunk seconds
+        for i in range(self._next_page, self.doc.page_count):
+            if self._quit:
+                return
+            cs = self._add_page(i)
+            if cs:
+                self.engine.extend_queue(cs)
+
+    # ----- controls -----
+    def toggle_pause(self):
+        self.paused = not self.paused
+        (self.engine.pause if self.paused else self.engine.resume)()
+
+    def change_wpm(self, delta: int):
+        self.engine.set_wpm(max(WPM_MIN, min(WPM_MAX, self.engine.wpm + delta)))
+
+    def stop(self):
+        self._quit = True
+        self.engine.stop()
+        self.engine.wait()
+
+    # ----- display -----
+    def current(self) -> int:
+        return min(self.engine.position()[0], len(self.chunks) - 1)
+
+    def status(self) -> str:
+        i = self.current()
+        state = "paused" if self.paused else "reading"
+        return (f" {self.doc.path.name} · page {self.pages[i] + 1}/{self.doc.page_count}"
+                f" · {self.engine.wpm} wpm · {state}   [space] pause  [←/→] sentence  [+/-] speed  [q] quit")
+
+
+def run_tui(reader: TerminalReader) -> None:
+    from prompt_toolkit.application import Application
+    from prompt_toolkit.key_binding import KeyBindings
+    from prompt_toolkit.layout import HSplit, Layout, Window
+    from prompt_toolkit.layout.controls import FormattedTextControl
+
+    kb = KeyBindings()
+    kb.add(" ")(lambda e: reader.toggle_pause())
+    kb.add("left")(lambda e: reader.engine.skip_sentence(-1))
+    kb.add("right")(lambda e: reader.engine.skip_sentence(1))
+    for key, delta in (("+", WPM_STEP), ("=", WPM_STEP), ("-", -WPM_STEP)):
+        kb.add(key)(lambda e, d=delta: reader.change_wpm(d))
+    kb.add("q")(lambda e: e.app.exit())
+    kb.add("c-c")(lambda e: e.app.exit())
+
+    text = Window(FormattedTextControl(lambda: reader.chunks[reader.current()]), wrap_lines=True)
+    bar = Window(FormattedTextControl(reader.status), height=1, style="reverse")
+    app = Application(layout=Layout(HSplit([text, bar])), key_bindings=kb,
+                      full_screen=True, refresh_interval=0.5)
+
+    def done(error: Optional[str] = None):
+        # engine callbacks run on the playback thread
+        reader.error = reader.error or error
+        if app.loop is not None:
+            app.loop.call_soon_threadsafe(lambda: app.is_done or app.exit())
+
+    reader.engine.on_progress = lambda i: app.invalidate()
+    reader.engine.on_finished = done
+    reader.engine.on_error = done
+    reader.engine.start()
+    app.run()
+
+
+def run_plain(reader: TerminalReader) -> None:
+    """Without a terminal (output piped): print each chunk as it is read."""
+    shown = [-1]
+
+    def show(i: int):
+        if i < len(reader.chunks) and i != shown[0]:
+            shown[0] = i
+            print(f"[page {reader.pages[i] + 1}] {reader.chunks[i]}", flush=True)
+
+    def failed(msg: str):
+        reader.error = msg
+
+    reader.engine.on_progress = show
+    reader.engine.on_error = failed
+    show(0)
+    reader.engine.start()
+    try:
+        while not reader.engine.wait(500):
+            pass
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m pdf_voice_reader read",
+                                 description="Read a PDF aloud in the terminal.")
+    ap.add_argument("pdf", type=Path)
+    ap.add_argument("--from-page", type=int, default=1, metavar="N", help="first page to read (1-based)")
+    ap.add_argument("--voice", help="Piper model path or part of an installed voice's name")
+    ap.add_argument("--wpm", type=int, help="reading speed (default: the GUI's last setting)")
+    args = ap.parse_args(argv)
+
+    last = _last_state()
+    voice = _pick_voice(args.voice, last.get("voice_model"))
+    if voice is None:
+        ap.error(f"no Piper voice matching {args.voice!r}" if args.voice else "no Piper voice installed")
+    doc = TextDoc(args.pdf)
+    try:
+        doc.open()
+    except Exception as e:
+        ap.error(f"cannot open {args.pdf}: {e}")
+    if not 1 <= args.from_page <= doc.page_count:
+        ap.error(f"--from-page must be between 1 and {doc.page_count}")
+
+    engine = ReadingEngine()
+    try:
+        engine.set_model(voice)
+    except Exception as e:
+        ap.error(str(e))
+    engine.set_wpm(max(WPM_MIN, min(WPM_MAX, args.wpm or int(last.get("wpm", 170)))))
+    reader = TerminalReader(doc, engine, args.from_page - 1)
+    if not reader.load():
+        print(f"no text from page {args.from_page} on", file=sys.stderr)
+        return 1
+    try:
+        (run_tui if sys.stdin.isatty() and sys.stdout.isatty() else run_plain)(reader)
+    finally:
+        reader.stop()
+        doc.close()
+    if reader.error:
+        print(reader.error, file=sys.stderr)
+        return 1
+    return 0
@@ -4,8 +4,12 @@ from pathlib import Path
 
 APP_NAME   = "Readie chan"
 STATE_FILE = Path.home() / ".pdf_voice_gui_state.json"
+STATE_SAVE_DELAY_MS = 400   # state changes within this window are written once
 DEFAULT_LIB = Path(os.environ.get("PDF_LIBRARY", "Path/to/your/pdf/library")).expanduser()
-CACHE_DIR   = Path.home() / ".cache" / "pdf_voice_reader" / "thumbs"
+CACHE_DIR   = Path.home() / ".cache" / "pdf_voice_reader"
+THUMB_DB    = CACHE_DIR / "thumbs.sqlite3"
+CATALOG_DB  = CACHE_DIR / "catalog.sqlite3"
+SESSIONS_DB = CACHE_DIR / "sessions.sqlite3"
 VOICE_DIRS  = [
     os.path.expanduser("~/.local/share/piper/voices"),#your path to your piper models, 
     "/usr/share/piper/voices",  
@@ -17,6 +21,37 @@ WINDOW_SIZE    = 10   # pages rendered at once
 PRELOAD_MARGIN = 2    # buffer around window
 MIN_SCALE      = 0.6
 MAX_SCALE      = 3.0
+RENDER_LEVEL_STEP = 2 ** 0.25   # pages are rasterized at powers of this (levels x1.19 apart)
+RENDER_REUSE_MAX  = 2.0         # a cached raster up to this much larger is downscaled instead
+ZOOM_SETTLE_MS    = 180         # pages are rasterized again once zooming paused this long
+ZOOM_WHEEL_STEP   = 1.1         # Ctrl+wheel zoom factor per notch
+PAGE_BUILD_BATCH  = 40          # page widgets created per event-loop turn
+FOLLOW_AHEAD      = 2           # pages past the one being read aloud that are prepared early
+# >0: render pages in this many worker processes instead of the GUI thread
+RENDER_PROCESSES  = int(os.environ.get("PDF_VOICE_READER_RENDER_PROCS", "0"))
+
+# Documents
+OPEN_DOCS_MAX       = 4     # recently used documents kept open for instant switching
+OPEN_DOCS_BUDGET_MB = 512   # combined cache memory of the open documents
+
+# Reading
+QUEUE_BUILD_PAGES = 4   # pages chunked per event-loop turn once the first is playing
+
+# Library
+THUMB_WORKERS  = max(1, min(4, (os.cpu_count() or 2) - 1))   # background cover renderers
+ICON_CACHE_SIZE = 600  # cover icons kept in memory by the gallery
+INGEST_PROCESSES = max(1, min(8, (os.cpu_count() or 2) - 1))  # metadata extraction processes
+
+# Startup
+STARTUP_TARGET_MS = 700   # time to first paint the startup profile checks against
+
+# Diagnostics
+STALL_THRESHOLD_MS = 200  # GUI event loop blocked longer than this is reported
+
+# Synthesis daemon
+DAEMON_SOCKET   = CACHE_DIR / "synthd.sock"
+DAEMON_WORKERS  = max(1, min(4, (os.cpu_count() or 2) // 2))   # concurrent Piper processes
+DAEMON_CACHE_MB = 256   # synthesized chunks kept for deduplication
 
 
 THEMES = {
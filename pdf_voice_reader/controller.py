@@ -1,24 +1,25 @@
 from __future__ import annotations
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from PySide6 import QtCore
 from .tts import PiperEngine
 
 class AppController(QtCore.QObject):
-    def __init__(self):
+    def __init__(self, engine: Optional[PiperEngine] = None):
         super().__init__()
         self.voice_model: Optional[str] = None
         self.wpm: int = 170
-        self.engine = PiperEngine()
+        self.engine = engine or PiperEngine()
 
     def connect(self, window: 'MainWindow'):
         window.gallery.opened.connect(lambda p: window.open_path(p))
         window.gallery.changed_dir.connect(lambda d: window.on_library_changed(d))
         window.pdf_view.wordClicked.connect(window.on_word_clicked)
+        self.engine.progress.connect(window.on_read_progress)
 
-    def start_queue(self, chunks: List[str]):
+    def start_queue(self, chunks: List[str], start: int = 0):
         if not chunks:
             return
-        self.engine.set_queue(chunks)
+        self.engine.set_queue(chunks, start)
         if self.voice_model:
             self.engine.set_model(self.voice_model)
         self.engine.set_wpm(self.wpm)
@@ -26,6 +27,10 @@ class AppController(QtCore.QObject):
         self.engine._pause_flag = False
         self.engine.start()
 
+    def set_wpm(self, wpm: int):
+        self.wpm = int(wpm)
+        self.engine.set_wpm(self.wpm)
+
     def pause(self):
         self.engine.pause()
 
@@ -34,3 +39,12 @@ class AppController(QtCore.QObject):
 
     def stop(self):
         self.engine.stop()
+
+    def seek(self, chunk: int, word: int = 0):
+        self.engine.seek_word(chunk, word)
+
+    def skip_sentence(self, delta: int):
+        self.engine.skip_sentence(delta)
+
+    def position(self) -> Tuple[int, int]:
+        return self.engine.position()
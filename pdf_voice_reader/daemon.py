@@ -0,0 +1,488 @@
+"""Local synthesis daemon: a job queue in front of a bounded pool of Piper workers.
+
+    python -m pdf_voice_reader daemon serve
+    python -m pdf_voice_reader daemon submit book.pdf --pages 40-60 --out ch3.wav
+    python -m pdf_voice_reader daemon status [JOB]
+
+Clients talk JSON lines over a Unix socket; a failed request is answered
+with ``{"ok": false, "error": ...}``. Jobs (file, pages, voice, WPM)
+are split into chunks exactly like the reader splits them; identical chunks
+(same voice, speed and text) are synthesized once, whether they are queued,
+running or recently done. Interactive ``synth`` requests (the GUI, through
+DaemonSynthesizer; set PDF_VOICE_READER_DAEMON=1) go ahead of batch jobs.
+"""
+from __future__ import annotations
+import argparse, hashlib, itertools, json, os, queue, socket, socketserver, sys, threading, time, wave
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+import numpy as np
+from .backends import PiperSynthesizer, Synthesizer
+from .config import DAEMON_CACHE_MB, DAEMON_SOCKET, DAEMON_WORKERS
+from .metrics import metrics
+from .model.pdftext import TextDoc
+from .util import chunk_text, map_wpm_to_length_scale, piper_sample_rate, validate_piper_model
+
+DAEMON_ENV = "PDF_VOICE_READER_DAEMON"   # "1" (default socket) or a socket path
+INTERACTIVE, BATCH = 0, 1                # queue priorities
+THROUGHPUT_WINDOW = 60.0                 # seconds of completions the rates cover
+
+
+def _key(text: str, voice: str, length_scale: float) -> str:
+    return hashlib.sha1(f"{voice}\0{length_scale:.3f}\0{text}".encode("utf-8")).hexdigest()
+
+
+class _Task:
+    """One distinct chunk; every job or request that needs it waits on it."""
+    __slots__ = ("key", "text", "voice", "length_scale", "waiters", "started", "done", "result", "error")
+
+    def __init__(self, key: str, text: str, voice: str, length_scale: float):
+        self.key, self.text, self.voice, self.length_scale = key, text, voice, length_scale
+        self.waiters = 1
+        self.started = False
+        self.done = threading.Event()
+        self.result: Optional[Tuple[np.ndarray, int]] = None   # (pcm, sample rate)
+        self.error: Optional[str] = None
+
+
+@dataclass
+class Job:
+    id: int
+    file: str
+    first: int                 # 0-based, inclusive
+    last: int
+    voice: str
+    wpm: int
+    out: Optional[str] = None
+    state: str = "queued"      # queued | running | done | failed | cancelled
+    total: int = 0
+    done: int = 0
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+
+    def info(self) -> dict:
+        return {k: getattr(self, k) for k in self.__dataclass_fields__}
+
+
+class SynthDaemon:
+    def __init__(self, socket_path: Optional[Path] = None, workers: int = DAEMON_WORKERS,
+                 cache_mb: int = DAEMON_CACHE_MB, synth_factory: Callable[[], Synthesizer] = PiperSynthesizer):
+        self.socket_path = Path(socket_path or DAEMON_SOCKET)
+        self.workers = max(1, int(workers))
+        self._factory = synth_factory
+        self._lock = threading.Lock()
+        self._queue: "queue.PriorityQueue[Tuple[int, int, Optional[_Task]]]" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._inflight: Dict[str, _Task] = {}
+        self._cache: "OrderedDict[str, Tuple[np.ndarray, int]]" = OrderedDict()
+        self._cache_bytes, self._cache_limit = 0, cache_mb * 1024 * 1024
+        self._jobs: Dict[int, Job] = {}
+        self._job_ids = itertools.count(1)
+        self._cancelled: set = set()
+        self._completed: Deque[Tuple[float, float]] = deque()   # (time, audio seconds)
+        self._started = time.monotonic()
+        self._threads: List[threading.Thread] = []
+        self._server: Optional[socketserver.ThreadingUnixStreamServer] = None
+
+    # ----- scheduling -----
+    def _chunk(self, text: str, voice: str, length_scale: float, prio: int) -> _Task:
+        key = _key(text, voice, length_scale)
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                metrics.counter("daemon.dedupe.hit").inc()
+                task = _Task(key, text, voice, length_scale)
+                task.result = hit
+                task.done.set()
+                return task
+            task = self._inflight.get(key)
+            if task is not None:
+                metrics.counter("daemon.dedupe.hit").inc()
+                task.waiters += 1
+                if prio == INTERACTIVE and not task.started:
+                    self._queue.put((prio, next(self._seq), task))   # jump the batch queue
+                return task
+            metrics.counter("daemon.dedupe.miss").inc()
+            task = self._inflight[key] = _Task(key, text, voice, length_scale)
+        self._queue.put((prio, next(self._seq), task))
+        return task
+
+    def _release(self, task: _Task) -> None:
+        with self._lock:
+            task.waiters -= 1
+
+    def _cache_put(self, key: str, result: Tuple[np.ndarray, int]) -> None:
+        self._cache[key] = result
+        self._cache_bytes += result[0].nbytes
+        while self._cache_bytes > self._cache_limit and len(self._cache) > 1:
+            _, (pcm, _sr) = self._cache.popitem(last=False)
+            self._cache_bytes -= pcm.nbytes
+
+    def _worker(self) -> None:
+        synth = self._factory()
+        voice: Optional[str] = None
+        while True:
+            _prio, _seq, task = self._queue.get()
+            if task is None:
+                return
+            with self._lock:
+                if task.started or task.done.is_set():
+                    continue   # a duplicate entry from a priority bump
+                if task.waiters <= 0:
+                    # everyone who wanted it was cancelled before it started
+                    self._inflight.pop(task.key, None)
+                    task.error = "cancelled"
+                    task.done.set()
+                    continue
+                task.started = True
+            t = time.monotonic()
+            try:
+                if task.voice != voice:
+                    synth.set_model(task.voice)
+                    voice = task.voice
+                pcm = synth.synthesize(task.text, task.length_scale)
+                task.result = (pcm, synth.sample_rate)
+                metrics.histogram("daemon.synth_ms").observe((time.monotonic() - t) * 1000.0)
+            except Exception as e:
+                task.error = str(e) or type(e).__name__
+                voice = None
+            with self._lock:
+                self._inflight.pop(task.key, None)
+                if task.result is not None:
+                    self._cache_put(task.key, task.result)
+                    self._completed.append((time.monotonic(), len(task.result[0]) / task.result[1]))
+            metrics.counter("daemon.chunks").inc()
+            task.done.set()
+
+    def synthesize(self, text: str, voice: str, length_scale: float) -> Tuple[np.ndarray, int]:
+        """Interactive synthesis of one chunk, ahead of queued batch work."""
+        task = self._chunk(text, voice, length_scale, INTERACTIVE)
+        task.done.wait()
+        self._release(task)
+        if task.error:
+            raise RuntimeError(task.error)
+        return task.result
+
+    # ----- jobs -----
+    def submit(self, file: str, first: int, last: int, voice: str, wpm: int, out: Optional[str] = None) -> Job:
+        with self._lock:
+            job = Job(next(self._job_ids), str(file), int(first), int(last), voice, int(wpm), out)
+            self._jobs[job.id] = job
+        threading.Thread(target=self._run_job, args=(job,), name=f"synthd-job-{job.id}", daemon=True).start()
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state not in ("queued", "running"):
+                return False
+            self._cancelled.add(job_id)
+            return True
+
+    def _run_job(self, job: Job) -> None:
+        tasks: List[Optional[_Task]] = []
+        wav: Optional[wave.Wave_write] = None
+        try:
+            doc = TextDoc(Path(job.file))
+            try:
+                doc.open()
+                last = min(job.last, doc.page_count - 1)
+                chunks = [c for i in range(job.first, last + 1) for c in chunk_text(doc.page_text(i))]
+            finally:
+                doc.close()
+            length_scale = map_wpm_to_length_scale(job.wpm)
+            job.total, job.state = len(chunks), "running"
+            tasks = [self._chunk(c, job.voice, length_scale, BATCH) for c in chunks]
+            for k, task in enumerate(tasks):
+                while not task.done.wait(0.2):
+                    if job.id in self._cancelled:
+                        job.state = "cancelled"
+                        return
+                tasks[k] = None   # collected; the cache keeps a copy if it fits
+                self._release(task)
+                if task.error:
+                    raise RuntimeError(task.error)
+                pcm, sr = task.result
+                if job.out:
+                    if wav is None:
+                        wav = wave.open(job.out, "wb")
+                        wav.setnchannels(1); wav.setsampwidth(2); wav.setframerate(sr)
+                    wav.writeframes(pcm.astype(np.int16).tobytes())
+                job.done += 1
+            job.state = "done"
+        except Exception as e:
+            job.state, job.error = "failed", str(e)
+        finally:
+            for task in tasks:
+                if task is not None:
+                    self._release(task)
+            if wav is not None:
+                wav.close()
+            job.finished = time.time()
+            self._cancelled.discard(job.id)
+
+    def job(self, job_id: int) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        return job.info() if job else None
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            while self._completed and now - self._completed[0][0] > THROUGHPUT_WINDOW:
+                self._completed.popleft()
+            window = min(THROUGHPUT_WINDOW, now - self._started) or 1.0
+            queued = sum(1 for t in self._inflight.values() if not t.started)
+            running = len(self._inflight) - queued
+            audio_s = sum(a for _t, a in self._completed)
+            states: Dict[str, int] = {}
+            for job in self._jobs.values():
+                states[job.state] = states.get(job.state, 0) + 1
+            out = {
+                "workers": self.workers,
+                "queue_depth": queued,
+                "running": running,
+                "jobs": states,
+                "chunks_per_s": round(len(self._completed) / window, 3),
+                "audio_x_realtime": round(audio_s / window, 3),
+                "dedupe_hit_rate": metrics.hit_rate("daemon.dedupe"),
+                "cache_mb": round(self._cache_bytes / 1024 / 1024, 1),
+            }
+        metrics.gauge("daemon.queue_depth").set(queued)
+        return out
+
+    # ----- server -----
+    def serve_forever(self) -> None:
+        if self.socket_path.exists():
+            try:
+                DaemonClient(self.socket_path).request({"op": "ping"})
+            except RuntimeError:
+                self.socket_path.unlink()   # left behind by a daemon that died
+            else:
+                raise RuntimeError(f"a daemon is already listening on {self.socket_path}")
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        for k in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"synthd-worker-{k}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if line.strip():
+                        daemon._handle(json.loads(line), self.wfile)
+
+        self._server = socketserver.ThreadingUnixStreamServer(str(self.socket_path), Handler)
+        self._server.daemon_threads = True
+        os.chmod(self.socket_path, 0o600)
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            for _ in self._threads:
+                self._queue.put((BATCH + 1, next(self._seq), None))
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+
+    def shutdown(self) -> None:
+        if self._server is not None:
+            # serve_forever's own thread must not call shutdown() synchronously
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+
+    def _handle(self, req: dict, out) -> None:
+        op = req.get("op")
+        try:
+            if op == "synth":
+                pcm, sr = self.synthesize(req["text"], req["voice"], float(req["length_scale"]))
+                data = pcm.astype(np.int16).tobytes()
+                out.write(json.dumps({"samples": len(pcm), "sample_rate": sr}).encode() + b"\n" + data)
+                out.flush()
+                return
+            if op == "ping":
+                resp = {"ok": True, "pid": os.getpid()}
+            elif op == "submit":
+                resp = self.submit(req["file"], req.get("first", 0), req.get("last", 1 << 30),
+                                   req["voice"], req.get("wpm", 170), req.get("out")).info()
+            elif op == "job":
+                resp = self.job(int(req["id"])) or {"ok": False, "error": f"no job {req['id']}"}
+            elif op == "jobs":
+                resp = {"jobs": [j.info() for j in list(self._jobs.values())]}
+            elif op == "cancel":
+                resp = {"cancelled": self.cancel(int(req["id"]))}
+            elif op == "stats":
+                resp = self.stats()
+            elif op == "shutdown":
+                resp = {"ok": True}
+                self.shutdown()
+            else:
+                resp = {"ok": False, "error": f"unknown op {op!r}"}
+        except Exception as e:
+            resp = {"ok": False, "error": str(e) or type(e).__name__}
+        out.write(json.dumps(resp).encode() + b"\n")
+        out.flush()
+
+
+# ---------------- client side ----------------
+
+class DaemonClient:
+    def __init__(self, socket_path: Optional[Path] = None):
+        self.socket_path = Path(socket_path or DAEMON_SOCKET)
+
+    def connect(self) -> socket.socket:
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            s.connect(str(self.socket_path))
+        except OSError as e:
+            s.close()
+            raise RuntimeError(f"synthesis daemon not reachable at {self.socket_path}: {e}") from None
+        return s
+
+    def request(self, req: dict) -> dict:
+        with self.connect() as s, s.makefile("rwb") as f:
+            f.write(json.dumps(req).encode() + b"\n")
+            f.flush()
+            line = f.readline()
+        if not line:
+            raise RuntimeError("synthesis daemon closed the connection")
+        resp = json.loads(line)
+        if resp.get("ok") is False:
+            raise RuntimeError(resp["error"])
+        return resp
+
+    def synthesize(self, text: str, voice: str, length_scale: float,
+                   on_connect: Callable[[Optional[socket.socket]], None] = lambda s: None) -> Tuple[np.ndarray, int]:
+        """``on_connect`` gets the socket while the request is in flight (for
+        cancelling it from another thread), then None."""
+        with self.connect() as s, s.makefile("rwb") as f:
+            on_connect(s)
+            try:
+                f.write(json.dumps({"op": "synth", "text": text, "voice": voice,
+                                    "length_scale": length_scale}).encode() + b"\n")
+                f.flush()
+                line = f.readline()
+                head = json.loads(line) if line else {"ok": False, "error": "synthesis cancelled"}
+                if head.get("ok") is False:
+                    raise RuntimeError(head["error"])
+                data = f.read(head["samples"] * 2)
+            finally:
+                on_connect(None)
+        if len(data) != head["samples"] * 2:
+            raise RuntimeError("synthesis cancelled")
+        return np.frombuffer(data, dtype=np.int16), int(head["sample_rate"])
+
+
+class DaemonSynthesizer(Synthesizer):
+    """Synthesizer backed by the daemon: chunks the daemon already made for a
+    job (or for another window) come back without running Piper again."""
+
+    def __init__(self, socket_path: Optional[Path] = None):
+        self.client = DaemonClient(socket_path)
+        self.model_path: Optional[str] = None
+        self._sock: Optional[socket.socket] = None
+
+    def set_model(self, model: str) -> None:
+        validate_piper_model(model)
+        self.model_path = model
+        self.sample_rate = piper_sample_rate(model)
+
+    def check(self) -> None:
+        if not self.model_path:
+            raise RuntimeError("No Piper model selected")
+        self.client.request({"op": "ping"})
+
+    def synthesize(self, text: str, length_scale: float) -> np.ndarray:
+        pcm, _sr = self.client.synthesize(text, self.model_path, length_scale, self._hold)
+        return pcm
+
+    def _hold(self, s: Optional[socket.socket]) -> None:
+        self._sock = s
+
+    def cancel(self) -> None:
+        s = self._sock
+        if s is not None:
+            try:
+                s.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def daemon_socket_from_env() -> Optional[Path]:
+    """The socket to use when PDF_VOICE_READER_DAEMON asks for the daemon."""
+    v = os.environ.get(DAEMON_ENV, "").strip()
+    if not v or v == "0":
+        return None
+    return DAEMON_SOCKET if v == "1" else Path(v).expanduser()
+
+
+# ---------------- command line ----------------
+
+def _pages(spec: Optional[str]) -> Tuple[int, int]:
+    if not spec:
+        return 0, 1 << 30
+    a, dash, b = spec.partition("-")
+    first = int(a) if a else 1
+    last = int(b) if b else (1 << 30 if dash else first)
+    return first - 1, last - 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .cli import _last_state, _pick_voice
+    ap = argparse.ArgumentParser(prog="python -m pdf_voice_reader daemon", description=__doc__.splitlines()[0])
+    ap.add_argument("--socket", type=Path, default=None, help=f"default: {DAEMON_SOCKET}")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("serve", help="run the daemon in the foreground")
+    p.add_argument("--workers", type=int, default=DAEMON_WORKERS)
+    p.add_argument("--cache-mb", type=int, default=DAEMON_CACHE_MB)
+    p = sub.add_parser("submit", help="queue a document (or page range) for narration")
+    p.add_argument("pdf", type=Path)
+    p.add_argument("--pages", help="e.g. 40-60, 40- or 7 (1-based, inclusive)")
+    p.add_argument("--voice", help="Piper model path or part of an installed voice's name")
+    p.add_argument("--wpm", type=int)
+    p.add_argument("--out", type=Path, help="write the narration to this WAV file")
+    p.add_argument("--wait", action="store_true", help="block until the job has finished")
+    p = sub.add_parser("status", help="daemon statistics, or one job")
+    p.add_argument("job", type=int, nargs="?")
+    p = sub.add_parser("cancel", help="cancel a job")
+    p.add_argument("job", type=int)
+    sub.add_parser("stop", help="shut the daemon down")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "serve":
+        d = SynthDaemon(args.socket, args.workers, args.cache_mb)
+        print(f"listening on {d.socket_path} with {d.workers} workers", file=sys.stderr)
+        try:
+            d.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    client = DaemonClient(args.socket)
+    try:
+        if args.cmd == "submit":
+            last = _last_state()
+            voice = _pick_voice(args.voice, last.get("voice_model"))
+            if voice is None:
+                ap.error(f"no Piper voice matching {args.voice!r}" if args.voice else "no Piper voice installed")
+            first, final = _pages(args.pages)
+            resp = client.request({"op": "submit", "file": str(args.pdf.resolve()), "first": first, "last": final,
+                                   "voice": voice, "wpm": args.wpm or int(last.get("wpm", 170)),
+                                   "out": str(args.out.resolve()) if args.out else None})
+            while args.wait and resp["state"] in ("queued", "running"):
+                time.sleep(0.5)
+                resp = client.request({"op": "job", "id": resp["id"]})
+        elif args.cmd == "status":
+            resp = client.request({"op": "job", "id": args.job} if args.job else {"op": "stats"})
+        elif args.cmd == "cancel":
+            resp = client.request({"op": "cancel", "id": args.job})
+        else:
+            resp = client.request({"op": "shutdown"})
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(json.dumps(resp, indent=2))
+    return 1 if resp.get("state") == "failed" else 0
@@ -0,0 +1,384 @@
+"""The reading engine: synthesis ahead of playback, pacing, seeking.
+
+Plain threads and callbacks, no Qt, so the terminal reader can use it
+without loading PySide; ``tts.PiperEngine`` turns the callbacks into signals.
+"""
+from __future__ import annotations
+import bisect, threading, time
+from typing import Callable, Optional, List, Dict, Tuple
+import numpy as np
+from .audio import TimeStretcher, quiet_point
+from .backends import Synthesizer, AudioSink, AplaySink, default_synthesizer
+from .metrics import metrics
+from .tracing import span
+from .util import map_wpm_to_length_scale, sentence_starts, word_starts
+
+BUFFER_MS   = 80   # audio handed to the sink per step; rate changes apply per buffer
+PREFETCH    = 3    # chunks synthesized ahead of playback
+KEEP_BEHIND = 4    # already-played chunks kept in memory (cheap backward seeks)
+
+
+class ReadingEngine:
+    def __init__(self, synth: Optional[Synthesizer] = None, sink: Optional[AudioSink] = None):
+        # called from the playback thread
+        self.on_progress: Callable[[int], None] = lambda i: None
+        self.on_finished: Callable[[], None] = lambda: None
+        self.on_error: Callable[[str], None] = lambda msg: None
+        self.model_path: Optional[str] = None
+        self.wpm: int = 170
+        self.synth: Synthesizer = synth or default_synthesizer()
+        self.sink: AudioSink = sink or AplaySink(BUFFER_MS * 2)
+        self._chunks: List[str] = []
+        self._i = 0
+        # resume point inside chunk _i: source sample, or a fraction of the
+        # chunk while its audio has not been synthesized yet
+        self._offset = 0
+        self._frac: Optional[float] = None
+        self._seek = 0
+        self._pause_at = 0.0
+        # (sink samples written, source sample reached) after each buffer of _i
+        self._mark_out: List[int] = []
+        self._mark_in: List[int] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stop_flag = False
+        self._pause_flag = False
+        self._sink_open = False
+        # synthesized PCM per chunk index, with the length_scale it was made at
+        self._audio: Dict[int, Tuple[np.ndarray, float]] = {}
+        self._gen = 0
+        self._cv = threading.Condition()
+        self._synth: Optional[threading.Thread] = None
+        self._synth_quit = False
+        self._t0 = 0.0
+        self._written = 0
+        self._started_at: Optional[float] = None   # start/queue/seek until its first buffer is written
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not self.running:
+            self._thread = threading.Thread(target=self._loop, name="tts-playback", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_flag = True
+        self._kill_procs()
+
+    def pause(self):
+        self._pause_at = time.monotonic()
+        self._pause_flag = True
+        self._close_sink()
+
+    def resume(self):
+        self._pause_flag = False
+        self.start()
+
+    def wait(self, msecs: int = 2000) -> bool:
+        """Block until the playback thread has exited (e.g. after stop())."""
+        if self._thread is not None:
+            self._thread.join(msecs / 1000.0)
+        return not self.running
+
+    def set_queue(self, chunks: List[str], start_index: int = 0):
+        with self._cv:
+            self._chunks = list(chunks)
+            self._i = max(0, min(start_index, len(chunks)))
+            self._offset, self._frac = 0, None
+            self._mark_out, self._mark_in = [], []
+            self._audio.clear()
+            self._gen += 1
+            self._started_at = time.monotonic()
+            self._cv.notify_all()
+
+    def extend_queue(self, chunks: List[str]):
+        """Append chunks behind the current queue (text still being extracted)."""
+        with self._cv:
+            self._chunks.extend(chunks)
+            self._cv.notify_all()
+
+    def set_model(self, model: str):
+        if model != self.model_path:
+            self.synth.set_model(model)
+            with self._cv:
+                self.model_path = model
+                self._audio.clear()
+                self._gen += 1
+                self._cv.notify_all()
+
+    def set_wpm(self, wpm: int):
+        # Queued audio is time-stretched on the fly; only chunks synthesized
+        # from now on use the new length_scale.
+        self.wpm = int(wpm)
+
+    # ----- position & seeking -----
+    def position(self) -> Tuple[int, int]:
+        """(chunk index, source sample) that is audible right now."""
+        with self._cv:
+            if self._pause_flag or not self._mark_out:
+                return self._i, self._offset
+            return self._i, self._audible_offset(time.monotonic())
+
+    def seek(self, chunk: int, sample: int = 0):
+        """Continue from ``sample`` of ``chunk``; cached audio is reused."""
+        self._seek_to(chunk, sample=sample)
+
+    def seek_word(self, chunk: int, word: int):
+        """Continue from the ``word``-th word of ``chunk`` (position estimated
+        from its character offset, then snapped to the nearest pause)."""
+        with self._cv:
+            if not (0 <= chunk < len(self._chunks)):
+                return
+            text = self._chunks[chunk]
+            starts = word_starts(text) or [0]
+            c = starts[max(0, min(word, len(starts) - 1))]
+            self._seek_to(chunk, frac=c / max(1, len(text)))
+
+    def skip_sentence(self, delta: int):
+        """Jump ``delta`` sentences forward (>0) or back (<0), across chunks.
+        Going back more than a second into a sentence restarts it first."""
+        with self._cv:
+            i, pos = self.position()
+            if not (0 <= i < len(self._chunks)):
+                return
+            text = self._chunks[i]
+            starts = sentence_starts(text)
+            clip = self._audio.get(i)
+            n = len(clip[0]) if clip else 0
+            frac = (pos / n) if n else (self._frac or 0.0)
+            cur = max(0, bisect.bisect_right(starts, frac * len(text)) - 1)
+            if delta < 0 and n:
+                into = pos - n * starts[cur] / max(1, len(text))
+                if into > self.synth.sample_rate:
+                    delta += 1
+            target = cur + delta
+            while target < 0 and i > 0:
+                i -= 1
+                starts = sentence_starts(self._chunks[i])
+                target += len(starts)
+            while target >= len(starts) and i < len(self._chunks) - 1:
+                target -= len(starts)
+                i += 1
+                starts = sentence_starts(self._chunks[i])
+            target = max(0, min(target, len(starts) - 1))
+            self._seek_to(i, frac=starts[target] / max(1, len(self._chunks[i])))
+
+    def _seek_to(self, chunk: int, sample: int = 0, frac: Optional[float] = None):
+        with self._cv:
+            self._i = max(0, min(int(chunk), len(self._chunks) - 1))
+            self._offset, self._frac = max(0, int(sample)), frac
+            self._mark_out, self._mark_in = [], []
+            self._seek += 1
+            self._started_at = time.monotonic()
+            self._evict()
+            self._cv.notify_all()
+
+    def _audible_offset(self, at: float) -> int:
+        # sink samples actually played by `at`, mapped back through the marks
+        out = self._mark_out[-1]
+        if self.sink.realtime:
+            out = min(out, max(self._mark_out[0], int((at - self._t0) * self.synth.sample_rate)))
+        k = bisect.bisect_left(self._mark_out, out)
+        if k == 0:
+            return self._mark_in[0]
+        o0, o1 = self._mark_out[k - 1], self._mark_out[k]
+        i0, i1 = self._mark_in[k - 1], self._mark_in[k]
+        return i0 + round((i1 - i0) * (out - o0) / max(1, o1 - o0))
+
+    def _resolve_offset(self, pcm: np.ndarray) -> int:
+        with self._cv:
+            if self._frac is not None:
+                guess = int(self._frac * len(pcm))
+                self._offset = quiet_point(pcm, guess, self.synth.sample_rate) if guess else 0
+                self._frac = None
+            return self._offset
+
+    def _evict(self):
+        keep = PREFETCH + KEEP_BEHIND
+        if len(self._audio) > keep:
+            for j in sorted(self._audio, key=lambda j: abs(j - self._i))[keep:]:
+                del self._audio[j]
+
+    def _kill_procs(self):
+        self.sink.close()
+        self.synth.cancel()
+
+    # ----- audio output -----
+    def _open_sink(self):
+        if not self._sink_open:
+            self.sink.open(self.synth.sample_rate)
+            self._sink_open = True
+            self._t0 = time.monotonic()
+            self._written = 0
+
+    def _close_sink(self):
+        self._sink_open = False
+        self.sink.close()
+
+    def _drain_sink(self):
+        self._sink_open = False
+        self.sink.drain(lambda: self._stop_flag or self._pause_flag)
+
+    def _write(self, pcm: np.ndarray) -> bool:
+        self._open_sink()
+        if self.sink.realtime:
+            # A pipe would swallow seconds of audio; stay at most two buffers ahead
+            # of the wall clock so speed/pause changes are heard within one buffer.
+            sr = self.synth.sample_rate
+            ahead = self._written / sr - (time.monotonic() - self._t0)
+            if ahead < 0:
+                self._t0 = time.monotonic() - self._written / sr
+            elif ahead > 2 * BUFFER_MS / 1000:
+                time.sleep(ahead - 2 * BUFFER_MS / 1000)
+        if self._stop_flag or self._pause_flag or not self._sink_open:
+            return False
+        try:
+            self.sink.write(pcm)
+        except Exception:
+            if self._stop_flag or self._pause_flag:
+                return False
+            raise
+        self._written += len(pcm)
+        if self._started_at is not None:
+            metrics.histogram("tts.first_audio_ms").observe((time.monotonic() - self._started_at) * 1000.0)
+            self._started_at = None
+        return True
+
+    # ----- background synthesis -----
+    def _next_job(self) -> Optional[Tuple[int, str]]:
+        for j in range(self._i, min(len(self._chunks), self._i + PREFETCH)):
+            if j not in self._audio:
+                return j, self._chunks[j]
+        return None
+
+    def _synth_loop(self):
+        while True:
+            with self._cv:
+                job = None
+                while not self._synth_quit and (job := self._next_job()) is None:
+                    self._cv.wait(0.1)
+                if self._synth_quit:
+                    return
+                gen = self._gen
+            i, text = job
+            length_scale = map_wpm_to_length_scale(self.wpm)
+            t = time.monotonic()
+            try:
+                with span("synthesize", "tts", chunk=i, chars=len(text)):
+                    pcm = self.synth.synthesize(text, length_scale)
+                if len(pcm):
+                    # real-time factor: synthesis time / audio duration
+                    rtf = (time.monotonic() - t) * self.synth.sample_rate / len(pcm)
+                    metrics.histogram("tts.synth_rtf").observe(rtf)
+            except Exception as e:
+                if not (self._synth_quit or self._stop_flag):
+                    self.on_error(str(e))
+                    self._stop_flag = True
+                with self._cv:
+                    self._cv.notify_all()
+                return
+            with self._cv:
+                if gen == self._gen:
+                    self._audio[i] = (pcm, length_scale)
+                    self._cv.notify_all()
+
+    def _start_synth(self):
+        self._synth_quit = False
+        self._synth = threading.Thread(target=self._synth_loop, name="tts-synth", daemon=True)
+        self._synth.start()
+
+    def _stop_synth(self):
+        with self._cv:
+            self._synth_quit = True
+            self._cv.notify_all()
+        self.synth.cancel()
+        if self._synth:
+            self._synth.join(timeout=1.0)
+            self._synth = None
+
+    # ----- playback -----
+    def _wait_audio(self, i: int, gen: int, seek: int) -> Optional[Tuple[np.ndarray, float]]:
+        with self._cv:
+            while (i not in self._audio and gen == self._gen and seek == self._seek
+                   and not (self._stop_flag or self._pause_flag)):
+                self._cv.wait(0.05)
+            if gen != self._gen or seek != self._seek or self._stop_flag or self._pause_flag:
+                return None
+            return self._audio[i]
+
+    def _halted(self, gen: int, seek: int) -> bool:
+        if self._stop_flag or gen != self._gen or seek != self._seek:
+            return True
+        if self._pause_flag:
+            with self._cv:
+                # remember exactly what was heard, unless a seek already moved us
+                if seek == self._seek and self._mark_out:
+                    self._offset, self._frac = self._audible_offset(self._pause_at), None
+                self._mark_out, self._mark_in = [], []
+            return True
+        return False
+
+    def _play(self, pcm: np.ndarray, length_scale: float, gen: int, seek: int, start: int) -> bool:
+        st = TimeStretcher(pcm, self.synth.sample_rate, start=start)
+        block = int(self.synth.sample_rate * BUFFER_MS / 1000)
+        self._open_sink()
+        with self._cv:
+            self._mark_out, self._mark_in = [self._written], [st.position]
+        while not st.done:
+            if self._halted(gen, seek):
+                self._close_sink()
+                return False
+            speed = length_scale / map_wpm_to_length_scale(self.wpm)
+            if not self._write(st.read(block, speed)):
+                self._halted(gen, seek)
+                return False
+            with self._cv:
+                if seek == self._seek:
+                    self._mark_out.append(self._written)
+                    self._mark_in.append(st.position)
+        return True
+
+    def _loop(self):
+        try:
+            self.synth.check(); self.sink.check()
+            self._start_synth()
+            self._started_at = time.monotonic()
+            first = True
+            while not self._stop_flag and self._i < len(self._chunks):
+                if self._pause_flag:
+                    time.sleep(0.05); continue
+                gen, seek, i = self._gen, self._seek, self._i
+                t = time.monotonic()
+                with span("wait_audio", "tts", chunk=i):
+                    clip = self._wait_audio(i, gen, seek)
+                if clip is None:
+                    continue
+                if not first:
+                    # silence between chunks while waiting for synthesis
+                    metrics.histogram("tts.chunk_gap_ms").observe((time.monotonic() - t) * 1000.0)
+                first = False
+                start = self._resolve_offset(clip[0])
+                with span("play", "tts", chunk=i):
+                    played = self._play(clip[0], clip[1], gen, seek, start)
+                if not played:
+                    continue
+                with self._cv:
+                    if gen != self._gen or seek != self._seek:
+                        continue
+                    self._i += 1
+                    self._offset, self._frac = 0, None
+                    self._mark_out, self._mark_in = [], []
+                    self._evict()
+                    self._cv.notify_all()
+                metrics.counter("tts.chunks_played").inc()
+                self.on_progress(self._i)
+            if not self._stop_flag:
+                with span("drain", "tts"):
+                    self._drain_sink()
+            self.on_finished()
+        except Exception as e:
+            self.on_error(str(e))
+        finally:
+            self._stop_synth()
+            self._kill_procs()
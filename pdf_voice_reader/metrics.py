@@ -0,0 +1,123 @@
+"""In-process metrics: counters, gauges and histograms.
+
+Hot paths call ``metrics.counter("x").inc()`` and friends; the HUD dock reads
+``metrics.snapshot()``. Everything is thread-safe (render, synthesis and
+playback threads all report here).
+"""
+from __future__ import annotations
+import json, threading, time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Deque, Dict, Iterator, Optional
+
+RECENT = 1024   # samples per histogram kept for percentiles
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, n: int = 1) -> None:
+        with self._lock:
+            self.value += n
+
+
+class Gauge:
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, v: float) -> None:
+        self.value = v
+
+
+class Histogram:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._recent: Deque[float] = deque(maxlen=RECENT)
+        self._lock = threading.Lock()
+
+    def observe(self, v: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += v
+            self.min = v if self.min is None else min(self.min, v)
+            self.max = v if self.max is None else max(self.max, v)
+            self._recent.append(v)
+
+    def summary(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            out = {"count": self.count, "mean": self.total / self.count if self.count else 0.0,
+                   "min": self.min, "max": self.max,
+                   "last": self._recent[-1] if self._recent else None}
+        for q in (50, 95, 99):
+            out[f"p{q}"] = recent[min(len(recent) - 1, len(recent) * q // 100)] if recent else None
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Counter] = {}
+        self.gauges: Dict[str, Gauge] = {}
+        self.histograms: Dict[str, Histogram] = {}
+
+    def _get(self, table: dict, name: str, cls):
+        m = table.get(name)
+        if m is None:
+            with self._lock:
+                m = table.setdefault(name, cls())
+        return m
+
+    def counter(self, name: str) -> Counter:
+        return self._get(self.counters, name, Counter)
+
+    def gauge(self, name: str) -> Gauge:
+        return self._get(self.gauges, name, Gauge)
+
+    def histogram(self, name: str) -> Histogram:
+        return self._get(self.histograms, name, Histogram)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Observe the duration of the block, in ms, into histogram ``name``."""
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name).observe((time.perf_counter() - t) * 1000.0)
+
+    def hit_rate(self, cache: str) -> Optional[float]:
+        """Hits / lookups for counters ``<cache>.hit`` and ``<cache>.miss``."""
+        hit = getattr(self.counters.get(cache + ".hit"), "value", 0)
+        total = hit + getattr(self.counters.get(cache + ".miss"), "value", 0)
+        return hit / total if total else None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters, gauges, hists = dict(self.counters), dict(self.gauges), dict(self.histograms)
+        caches = sorted({k.rsplit(".", 1)[0] for k in counters if k.endswith((".hit", ".miss"))})
+        return {
+            "time": time.time(),
+            "counters": {k: c.value for k, c in sorted(counters.items())},
+            "gauges": {k: g.value for k, g in sorted(gauges.items())},
+            "histograms": {k: h.summary() for k, h in sorted(hists.items())},
+            "hit_rates": {c: self.hit_rate(c) for c in caches},
+        }
+
+    def export_json(self, path: Path) -> None:
+        Path(path).write_text(json.dumps(self.snapshot(), indent=2))
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+
+metrics = Registry()
@@ -0,0 +1,59 @@
+"""Where the chunks of a reading queue come from in the document."""
+from __future__ import annotations
+from bisect import bisect_right
+from typing import List, Optional, Sequence, Tuple
+from ..util import chunk_words
+
+
+class ChunkIndex:
+    """Chunk ``k`` of a queue is words ``first[k]``..``last[k]`` (inclusive,
+    indices into PDFDoc.page_words) of page ``page[k]``.
+
+    Chunks are added in reading order, so chunk -> source is a list lookup
+    and (page, word) -> chunk a bisection of the chunks' starts."""
+
+    def __init__(self):
+        self.page: List[int] = []
+        self.first: List[int] = []
+        self.last: List[int] = []
+        self._starts: List[Tuple[int, int]] = []   # (page, first) of every chunk
+        self._pages: List[int] = []                # pages with chunks, in order
+        self._page_chunk: List[int] = []           # first chunk of each of them
+
+    def __len__(self) -> int:
+        return len(self.page)
+
+    def add_page(self, page: int, words: Sequence[str], start: int = 0,
+                 target_len: int = 420) -> List[str]:
+        """Chunk ``words[start:]`` of ``page`` onto the end of the queue and
+        return the new chunks' text."""
+        if self._pages and page <= self._pages[-1]:
+            raise ValueError(f"page {page} added after page {self._pages[-1]}")
+        out: List[str] = []
+        for a, b in chunk_words(words[start:], target_len):
+            if not out:
+                self._pages.append(page)
+                self._page_chunk.append(len(self.page))
+            self.page.append(page)
+            self.first.append(start + a)
+            self.last.append(start + b)
+            self._starts.append((page, start + a))
+            out.append(" ".join(words[start + a:start + b + 1]))
+        return out
+
+    def source(self, chunk: int, word: int = 0) -> Tuple[int, int]:
+        """(page, word on that page) of the ``word``-th word of ``chunk``."""
+        return self.page[chunk], min(self.first[chunk] + word, self.last[chunk])
+
+    def chunk_at(self, page: int, word: int) -> Optional[Tuple[int, int]]:
+        """(chunk, word within it) that reads word ``word`` of ``page``, or
+        None if the queue does not."""
+        k = bisect_right(self._starts, (page, word)) - 1
+        if k < 0 or self.page[k] != page or word > self.last[k]:
+            return None
+        return k, word - self.first[k]
+
+    def pages_from(self, chunk: int, n: int = 0) -> List[int]:
+        """The page of ``chunk`` and the next ``n`` pages the queue reads."""
+        j = bisect_right(self._page_chunk, chunk) - 1
+        return self._pages[j:j + n + 1] if j >= 0 else []
@@ -0,0 +1,141 @@
+from __future__ import annotations
+import os, threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+from PySide6 import QtCore
+from ..config import OPEN_DOCS_MAX, OPEN_DOCS_BUDGET_MB, WINDOW_SIZE, PRELOAD_MARGIN
+from ..metrics import metrics
+from .pdfdoc import PDFDoc
+
+TRIM_DELAY_MS = 500
+SIZE_BATCH    = 64    # page sizes read per FITZ_LOCK hold while opening in the background
+
+
+def _signature(path: Path) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+class DocumentPool(QtCore.QObject):
+    """Recently used documents, kept open with their caches for instant switching.
+
+    At most ``max_docs`` stay open; while the caches of all of them exceed the
+    budget the least recently used are closed (and, if the current one alone
+    is over, its oldest rendered pages are dropped). A document that changed
+    on disk is reopened."""
+    opened     = QtCore.Signal(object)        # PDFDoc from open_async; its first page can be shown
+    openFailed = QtCore.Signal(str, str)      # path, error
+    _first     = QtCore.Signal(str, object, object)   # worker -> GUI thread: key, doc, cancel event
+
+    def __init__(self, max_docs: int = OPEN_DOCS_MAX, budget_mb: int = OPEN_DOCS_BUDGET_MB, parent=None):
+        super().__init__(parent)
+        self.max_docs = max(1, max_docs)
+        self.budget = budget_mb * 1024 * 1024
+        self._docs: "OrderedDict[str, Tuple[PDFDoc, Tuple[int, int]]]" = OrderedDict()
+        self._trim_timer = QtCore.QTimer(self, singleShot=True, interval=TRIM_DELAY_MS)
+        self._trim_timer.timeout.connect(self.trim)
+        self._opening: Optional[threading.Event] = None   # cancels the open in flight
+        self._first.connect(self._adopt)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, path) -> bool:
+        return str(Path(path).resolve()) in self._docs
+
+    def open_async(self, path: Path) -> Optional[PDFDoc]:
+        """The open document for ``path``, now the most recently used one.
+        One that is not open yet is not waited for: None is returned and it
+        is opened on a worker thread, and ``opened`` is emitted once its first
+        page can be shown; the sizes of the other pages go on being read
+        there. Any other open in flight is cancelled."""
+        self.cancel_open()
+        key = str(Path(path).resolve())
+        cancel = self._opening = threading.Event()
+        doc = self._pooled(key)
+        if doc is not None:
+            if doc.sizes_known < doc.page_count:   # its last open was cut short
+                threading.Thread(target=self._read_sizes, args=(doc, cancel),
+                                 name="doc-open", daemon=True).start()
+            return doc
+        threading.Thread(target=self._open_worker, args=(key, PDFDoc(Path(path)), cancel),
+                         name="doc-open", daemon=True).start()
+        return None
+
+    def cancel_open(self) -> None:
+        if self._opening is not None:
+            self._opening.set()
+            self._opening = None
+
+    def _pooled(self, key: str) -> Optional[PDFDoc]:
+        sig = _signature(Path(key))
+        doc, old = self._docs.pop(key, (None, None))
+        if doc is not None and old != sig:
+            doc.close()
+            doc = None
+        metrics.counter("docpool.miss" if doc is None else "docpool.hit").inc()
+        if doc is not None:
+            self._docs[key] = (doc, sig)
+        return doc
+
+    def _add(self, key: str, doc: PDFDoc) -> None:
+        doc.pageRendered.connect(self._trim_timer.start)
+        self._docs[key] = (doc, _signature(Path(key)))
+        self.trim()
+
+    # ----- background open -----
+    def _open_worker(self, key: str, doc: PDFDoc, cancel: threading.Event) -> None:
+        try:
+            doc.open()
+        except Exception as e:
+            if not cancel.is_set():
+                self.openFailed.emit(str(doc.path), str(e) or type(e).__name__)
+            return
+        if cancel.is_set():
+            doc.close()
+            return
+        self._first.emit(key, doc, cancel)
+        self._read_sizes(doc, cancel)
+
+    def _read_sizes(self, doc: PDFDoc, cancel: threading.Event) -> None:
+        while doc.doc is not None and doc.sizes_known < doc.page_count and not cancel.is_set():
+            doc.read_sizes(SIZE_BATCH)
+
+    def _adopt(self, key: str, doc: PDFDoc, cancel: threading.Event) -> None:
+        if cancel.is_set():
+            doc.close()
+            return
+        try:
+            self._add(key, doc)
+        except OSError as e:   # gone since it was opened
+            doc.close()
+            self.openFailed.emit(str(doc.path), str(e))
+            return
+        self.opened.emit(doc)
+
+    def trim(self) -> None:
+        while len(self._docs) > self.max_docs:
+            self._evict()
+        sizes = {k: d.memory_bytes() for k, (d, _s) in self._docs.items()}
+        total = sum(sizes.values())
+        while total > self.budget and len(self._docs) > 1:
+            total -= sizes.pop(self._evict())
+        if total > self.budget and self._docs:
+            # the current document alone is over budget
+            doc = next(reversed(self._docs.values()))[0]
+            doc.trim_pixmaps(self.budget, keep=WINDOW_SIZE + 2 * PRELOAD_MARGIN)
+            total = doc.memory_bytes()
+        metrics.gauge("docpool.open").set(len(self._docs))
+        metrics.gauge("docpool.cache_mb").set(round(total / 1024 / 1024, 1))
+
+    def _evict(self) -> str:
+        key, (doc, _sig) = self._docs.popitem(last=False)
+        doc.pageRendered.disconnect(self._trim_timer.start)
+        doc.close()
+        return key
+
+    def close_all(self) -> None:
+        self.cancel_open()
+        while self._docs:
+            self._evict()
@@ -0,0 +1,144 @@
+from __future__ import annotations
+import multiprocessing, threading, time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Deque, Dict, List, Optional
+from PySide6 import QtCore
+from ..config import INGEST_PROCESSES
+from .pdfmeta import extract_metadata
+
+FLUSH_INTERVAL = 0.25   # seconds between result batches sent to the GUI
+
+
+class LibraryIngest(QtCore.QObject):
+    """Extracts metadata for many PDFs in a process pool.
+
+    Results arrive in batches on the GUI thread. A file that fails comes back
+    with an ``error`` key; a file that crashes its worker is retried alone and,
+    if it crashes again, reported as failed while the rest carry on.
+    """
+    batch    = QtCore.Signal(list)               # result dicts (see extract_metadata)
+    progress = QtCore.Signal(int, int, float)    # done, total, files per second
+    idle     = QtCore.Signal()
+
+    def __init__(self, workers: int = INGEST_PROCESSES, parent=None):
+        super().__init__(parent)
+        self.workers = max(1, int(workers))
+        self._lock = threading.Lock()
+        self._queue: Deque[str] = deque()
+        self._queued = set()
+        self._thread: Optional[threading.Thread] = None
+        self._cancel = False
+        self._done = 0
+        self._total = 0
+        self._epoch = 0   # bumped by cancel; work from before it is not counted
+
+    def submit(self, paths: List[str]) -> None:
+        with self._lock:
+            new = [p for p in paths if p not in self._queued]
+            self._queue.extend(new)
+            self._queued.update(new)
+            self._total += len(new)
+            if not new:
+                return
+            self._cancel = False   # a running loop simply picks up the new queue
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._cancel = True
+            self._queue.clear()
+            self._queued.clear()
+            self._done = self._total = 0
+            self._epoch += 1
+
+    @property
+    def busy(self) -> bool:
+        return self._thread is not None
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # never fork a process that runs Qt
+        return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _run(self) -> None:
+        pool = self._new_pool()
+        inflight: Dict[Future, str] = {}
+        epoch_of: Dict[Future, int] = {}
+        epoch = self._epoch
+        suspects: Deque[str] = deque()   # in flight when a worker died
+        buf: List[dict] = []
+        t0 = last_flush = time.monotonic()
+        try:
+            while True:
+                with self._lock:
+                    if self._cancel:
+                        self._finish()
+                        break
+                    if epoch != self._epoch:
+                        # cancelled and resubmitted before this loop noticed
+                        epoch, t0 = self._epoch, time.monotonic()
+                        suspects.clear()
+                    if suspects:
+                        # isolate: run suspects one at a time
+                        if not inflight:
+                            p = suspects.popleft()
+                            f = pool.submit(extract_metadata, p)
+                            inflight[f], epoch_of[f] = p, epoch
+                    else:
+                        while self._queue and len(inflight) < 2 * self.workers:
+                            p = self._queue.popleft()
+                            f = pool.submit(extract_metadata, p)
+                            inflight[f], epoch_of[f] = p, epoch
+                    if not inflight:
+                        self._finish()
+                        break
+                isolated = bool(suspects) or len(inflight) == 1
+                finished, _ = wait(list(inflight), timeout=FLUSH_INTERVAL, return_when=FIRST_COMPLETED)
+                broken = False
+                for f in finished:
+                    p, born = inflight.pop(f), epoch_of.pop(f)
+                    try:
+                        buf.append(f.result())
+                    except BrokenProcessPool:
+                        broken = True
+                        if isolated:
+                            buf.append({"path": p, "error": "crashed the PDF reader"})
+                        else:
+                            suspects.append(p)
+                            continue
+                    except Exception as e:
+                        buf.append({"path": p, "error": f"{type(e).__name__}: {e}"})
+                    if born == self._epoch:
+                        self._done += 1
+                if broken:
+                    suspects.extend(p for f, p in inflight.items() if epoch_of[f] == self._epoch)
+                    inflight.clear()
+                    epoch_of.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self._new_pool()
+                now = time.monotonic()
+                if buf and now - last_flush >= FLUSH_INTERVAL:
+                    self._flush(buf, self._done, self._total, self._done / max(1e-6, now - t0))
+                    buf, last_flush = [], now
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            with self._lock:
+                if self._thread is threading.current_thread():   # left by an exception
+                    self._finish()
+            if buf:
+                self.batch.emit(buf)
+            self.idle.emit()
+
+    def _finish(self) -> None:
+        # called with the lock held: a later submit() starts a fresh run
+        self._queued.clear()
+        self._done = self._total = 0
+        self._thread = None
+
+    def _flush(self, buf: List[dict], done: int, total: int, rate: float) -> None:
+        self.batch.emit(buf)
+        self.progress.emit(done, total, rate)
@@ -0,0 +1,213 @@
+from __future__ import annotations
+import json, os, sqlite3, threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
+from PySide6 import QtCore
+from ..config import CATALOG_DB
+from .ingest import LibraryIngest
+
+
+class Entry(NamedTuple):
+    path: str
+    size: int
+    mtime_ns: int
+    pages: int = -1          # -1 until the file has been opened once
+    title: str = ""
+    # author, subject, keywords, outline_depth, has_text, ... or error; the
+    # default is read-only so no two entries can share a mutable dict
+    meta: Mapping = MappingProxyType({})
+
+    @property
+    def needs_ingest(self) -> bool:
+        return self.pages < 0 and "error" not in self.meta
+
+    @property
+    def name(self) -> str:
+        return Path(self.path).stem
+
+    @property
+    def display_title(self) -> str:
+        return self.title or self.name
+
+
+class LibraryCatalog(QtCore.QObject):
+    """On-disk catalog of the PDFs under one library directory.
+
+    The catalog is loaded with a single query; afterwards it is only updated
+    incrementally: a stat-only rescan in a background thread (at startup, or
+    for directories a QFileSystemWatcher reports as changed) diffs size/mtime
+    against what is stored. New or changed files are then opened in a process
+    pool (see LibraryIngest) and their metadata filled in as it arrives.
+    """
+    changed = QtCore.Signal()                          # entries added or removed
+    updated = QtCore.Signal(list)                      # entries whose metadata arrived
+    _scanned = QtCore.Signal(int, list, list, list)   # gen, upserts, removed paths, dirs
+
+    def __init__(self, lib_dir: Path, db_path: Path = CATALOG_DB, parent=None):
+        super().__init__(parent)
+        self.db_path = Path(db_path)
+        self.lib_dir = Path(lib_dir)
+        self.entries: Dict[str, Entry] = {}
+        self._gen = 0
+        self._local = threading.local()
+        self._dirty: Set[str] = set()
+        self._scanning = False
+        self._watcher = QtCore.QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_dir_changed)
+        self._debounce = QtCore.QTimer(self, singleShot=True, interval=300)
+        self._debounce.timeout.connect(self._rescan_dirty)
+        self._scanned.connect(self._apply)
+        self.ingest = LibraryIngest(parent=self)
+        self.ingest.batch.connect(self._on_ingested)
+
+    # ----- storage -----
+    def _db(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            con = sqlite3.connect(str(self.db_path), timeout=10)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+                " pages INTEGER NOT NULL DEFAULT -1, title TEXT NOT NULL DEFAULT '',"
+                " meta TEXT NOT NULL DEFAULT '{}')"
+            )
+            self._local.con = con
+        return con
+
+    def load(self, lib_dir: Optional[Path] = None) -> None:
+        """Switch to ``lib_dir`` (if given) and read its catalog in one query."""
+        if lib_dir is not None:
+            self.lib_dir = Path(lib_dir)
+        self._gen += 1
+        self._dirty.clear()
+        prefix = str(self.lib_dir).rstrip(os.sep) + os.sep
+        rows = self._db().execute(
+            "SELECT path, size, mtime_ns, pages, title, meta FROM entries"
+            " WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+        ).fetchall()
+        self.entries = {r[0]: Entry(r[0], r[1], r[2], r[3], r[4], json.loads(r[5] or "{}") or {}) for r in rows}
+        if self._watcher.directories():
+            self._watcher.removePaths(self._watcher.directories())
+        self.ingest.cancel()
+        self.changed.emit()
+        self._ingest_missing()
+
+    def _store(self, upserts: Iterable[Entry], removed: Iterable[str]) -> None:
+        con = self._db()
+        con.executemany("DELETE FROM entries WHERE path=?", [(p,) for p in removed])
+        con.executemany(
+            "INSERT OR REPLACE INTO entries (path, size, mtime_ns, pages, title, meta)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            [(e.path, e.size, e.mtime_ns, e.pages, e.title, json.dumps(dict(e.meta))) for e in upserts],
+        )
+        con.commit()
+
+    def update(self, entry: Entry) -> None:
+        """Replace one entry (e.g. after metadata extraction) and persist it."""
+        self.entries[entry.path] = entry
+        self._store([entry], [])
+
+    # ----- metadata -----
+    def _ingest_missing(self) -> None:
+        todo = [p for p, e in self.entries.items() if e.needs_ingest]
+        if todo:
+            self.ingest.submit(sorted(todo))
+
+    @QtCore.Slot(list)
+    def _on_ingested(self, results: list) -> None:
+        done: List[Entry] = []
+        for r in results:
+            e = self.entries.get(r["path"])
+            if e is None:
+                continue
+            if "error" in r:
+                e = e._replace(meta={"error": r["error"]})
+            else:
+                meta = {k: v for k, v in r.items() if k not in ("path", "pages", "title")}
+                e = e._replace(pages=r["pages"], title=r["title"], meta=meta)
+            self.entries[e.path] = e
+            done.append(e)
+        if done:
+            self._store(done, [])
+            self.updated.emit(done)
+
+    # ----- queries -----
+    def sorted_entries(self) -> List[Entry]:
+        return [self.entries[k] for k in sorted(self.entries)]
+
+    # ----- incremental rescans -----
+    def rescan(self) -> None:
+        """Stat-only walk of the whole library in the background."""
+        self._start_scan([str(self.lib_dir)])
+
+    def _on_dir_changed(self, d: str) -> None:
+        self._dirty.add(d)
+        self._debounce.start()
+
+    def _rescan_dirty(self) -> None:
+        if self._scanning:
+            self._debounce.start()
+            return
+        dirs, self._dirty = sorted(self._dirty), set()
+        # a changed parent already covers its subdirectories
+        roots = [d for d in dirs if not any(d != o and d.startswith(o.rstrip(os.sep) + os.sep) for o in dirs)]
+        if roots:
+            self._start_scan(roots)
+
+    def _start_scan(self, roots: List[str]) -> None:
+        self._scanning = True
+        known = {p: (e.size, e.mtime_ns) for p, e in self.entries.items()}
+        args = (self._gen, self.lib_dir, roots, known)
+        threading.Thread(target=self._scan, args=args, daemon=True).start()
+
+    def _scan(self, gen: int, lib_dir: Path, roots: List[str], known: Dict[str, Tuple[int, int]]):
+        found: Dict[str, Tuple[int, int]] = {}
+        dirs: List[str] = []
+        try:
+            lib_dir.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            pass
+        stack = [r for r in roots if os.path.isdir(r)]
+        while stack:
+            d = stack.pop()
+            dirs.append(d)
+            try:
+                with os.scandir(d) as it:
+                    for e in it:
+                        try:
+                            if e.is_dir(follow_symlinks=False):
+                                stack.append(e.path)
+                            elif e.name.lower().endswith(".pdf") and e.is_file():
+                                st = e.stat()
+                                found[e.path] = (st.st_size, st.st_mtime_ns)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        prefixes = tuple(r.rstrip(os.sep) + os.sep for r in roots)
+        removed = [p for p in known if p.startswith(prefixes) and p not in found]
+        upserts = [Entry(p, size, mtime_ns) for p, (size, mtime_ns) in found.items()
+                   if known.get(p) != (size, mtime_ns)]
+        if upserts or removed:
+            self._store(upserts, removed)
+        self._scanned.emit(gen, upserts, removed, dirs)
+
+    @QtCore.Slot(int, list, list, list)
+    def _apply(self, gen: int, upserts: list, removed: list, dirs: list) -> None:
+        self._scanning = False
+        if gen != self._gen:
+            return
+        new_dirs = set(dirs) - set(self._watcher.directories())
+        if new_dirs:
+            self._watcher.addPaths(sorted(new_dirs))
+        for p in removed:
+            self.entries.pop(p, None)
+        for e in upserts:
+            self.entries[e.path] = e
+        if upserts or removed:
+            self.changed.emit()
+        if upserts:
+            self.ingest.submit(sorted(e.path for e in upserts))
@@ -1,10 +1,62 @@
 from __future__ import annotations
-from typing import Optional, Tuple, Dict, List
+import math
+from typing import TYPE_CHECKING, Optional, Tuple, Dict, List
 from pathlib import Path
 from PySide6 import QtCore, QtGui
-import fitz
-from ..config import CACHE_DIR
-from ..util import slugify
+from ..config import RENDER_LEVEL_STEP, RENDER_REUSE_MAX
+from ..metrics import metrics
+from ..tracing import span
+from .pdftext import FITZ_LOCK, extract_page_text
+from .thumbstore import thumb_store
+
+if TYPE_CHECKING:
+    import fitz
+
+# fitz (MuPDF) takes a noticeable part of startup, so it is imported where
+# first needed; MainWindow warms it in the background after the first paint.
+
+
+def render_cover(path: Path, max_w: int = 200, data: Optional[bytes] = None) -> QtGui.QImage:
+    """Cover of ``path`` as a QImage (safe to call from worker threads).
+
+    ``data`` is an already loaded thumbnail (see ThumbStore.get_many)."""
+    try:
+        store = thumb_store()
+        data = data or store.get(path, max_w)
+        if data:
+            img = QtGui.QImage.fromData(data)
+            if not img.isNull():
+                return img
+        import fitz
+        with span("render_cover", "gallery"), FITZ_LOCK:
+            doc = fitz.open(path)
+            try:
+                page = doc.load_page(0)
+                ratio = max_w / max(1.0, page.rect.width)
+                pm = page.get_pixmap(matrix=fitz.Matrix(ratio, ratio), alpha=False)
+            finally:
+                doc.close()
+        img = QtGui.QImage(pm.samples, pm.width, pm.height, pm.stride, QtGui.QImage.Format_RGB888).copy()
+        buf = QtCore.QBuffer()
+        buf.open(QtCore.QIODevice.WriteOnly)
+        img.save(buf, "JPG", 82)
+        store.put(path, max_w, bytes(buf.data()))
+        return img
+    except Exception:
+        return QtGui.QImage()
+
+
+_LEVEL_SLACK = 1.001   # a level this close below the target still counts as covering it
+
+
+def render_level(target: float) -> float:
+    """The rung of the render ladder at or just above ``target`` (device px per pt)."""
+    k = math.ceil(math.log(target / _LEVEL_SLACK, RENDER_LEVEL_STEP))
+    return round(RENDER_LEVEL_STEP ** k, 4)
+
+
+WORD_BYTES = 200   # rough size of one cached word box (tuple, floats, str)
+
 
 class PDFDoc(QtCore.QObject):
     """Model: PDF file access, rendering cache, word hit-testing."""
@@ -16,72 +68,169 @@ class PDFDoc(QtCore.QObject):
         self.doc: Optional[fitz.Document] = None
         self.page_count = 0
         self._words_cache: Dict[int, List[Tuple[float,float,float,float, str]]] = {}
+        self._text_cache: Dict[int, str] = {}
         self._pix_cache: Dict[tuple, QtGui.QPixmap] = {}
         self._page_sizes: Dict[int, Tuple[float,float]] = {}
+        self.sizes_known = 0   # pages 0..sizes_known-1 have their size read
 
     def open(self):
+        """Open the file and read the first page's size; the others are read
+        by read_sizes (DocumentPool does it in the background) or on demand."""
         if self.doc:
             return
-        self.doc = fitz.open(self.path)
-        self.page_count = len(self.doc)
-        for i in range(self.page_count):
+        import fitz
+        with span("open", "pdf"), FITZ_LOCK:
+            self.doc = fitz.open(self.path)
+            self.page_count = len(self.doc)
+            if self.page_count:
+                self._read_size(0)
+        self.sizes_known = min(1, self.page_count)
+
+    def read_sizes(self, count: int = 0) -> int:
+        """Read the sizes of the next ``count`` pages (0: all of them) and
+        return how many leading pages have a known size."""
+        end = self.page_count if count <= 0 else min(self.page_count, self.sizes_known + count)
+        with FITZ_LOCK:
+            if self.doc is None:   # closed meanwhile
+                return self.sizes_known
+            for i in range(self.sizes_known, end):
+                if i not in self._page_sizes:
+                    self._read_size(i)
+            self.sizes_known = max(self.sizes_known, end)
+        return self.sizes_known
+
+    def _read_size(self, i: int) -> Tuple[float, float]:
+        try:
             r = self.doc.load_page(i).rect
-            self._page_sizes[i] = (float(r.width), float(r.height))
+            size = (float(r.width), float(r.height))
+        except Exception:
+            # damaged page: lay it out like its neighbour
+            size = self._page_sizes.get(i - 1, (612.0, 792.0))
+        self._page_sizes[i] = size
+        return size
 
     def close(self):
         if self.doc:
-            self.doc.close()
-            self.doc = None
+            with FITZ_LOCK:
+                self.doc.close()
+                self.doc = None   # under the lock: read_sizes may run on a worker
             self.page_count = 0
+            self.sizes_known = 0
             self._words_cache.clear()
+            self._text_cache.clear()
             self._pix_cache.clear()
             self._page_sizes.clear()
 
     def page_text(self, i: int) -> str:
         self.open()
-        return self.doc.load_page(i).get_text("text").strip()
+        if i in self._text_cache:
+            metrics.counter("text_cache.hit").inc()
+            return self._text_cache[i]
+        metrics.counter("text_cache.miss").inc()
+        text = extract_page_text(self.doc, i)
+        self._text_cache[i] = text
+        return text
 
     def page_words(self, i: int) -> List[Tuple[float,float,float,float,str]]:
         self.open()
         if i in self._words_cache:
+            metrics.counter("words_cache.hit").inc()
             return self._words_cache[i]
-        page = self.doc.load_page(i)
-        words = page.get_text("words")
+        metrics.counter("words_cache.miss").inc()
+        with span("page_words", "pdf", page=i), metrics.timer("pdf.page_words_ms"), FITZ_LOCK:
+            words = self.doc.load_page(i).get_text("words")
         out = [(w[0], w[1], w[2], w[3], w[4]) for w in words]
         self._words_cache[i] = out
         return out
 
     def page_size(self, i: int) -> Tuple[float,float]:
         self.open()
-        return self._page_sizes[i]
+        size = self._page_sizes.get(i)
+        if size is None:
+            with FITZ_LOCK:
+                size = self._read_size(i)
+        return size
+
+    def render_page(self, i: int, scale: float, dpr: float = 1.0) -> QtGui.QPixmap:
+        """Page ``i`` at ``scale`` (logical px per pt) for a screen with device
+        pixel ratio ``dpr``. Rasters are made at quantized levels and cached; a
+        cached level a little above the target is smoothly scaled down to it.
+        A page's first raster is made at exactly the target (nothing to share
+        yet, and no downscale to pay for)."""
+        pix = self.cached_page(i, scale, dpr)
+        if pix is None:
+            if any(p == i for p, _level in self._pix_cache):
+                level = render_level(scale * dpr)
+            else:
+                level = round(scale * dpr, 4)
+            self.add_raster(i, level, self._rasterize(i, level))
+            pix = self.cached_page(i, scale, dpr, count=False)
+        return pix
 
-    def render_page(self, i: int, scale: float) -> QtGui.QPixmap:
+    def cached_page(self, i: int, scale: float, dpr: float = 1.0, count: bool = True) -> Optional[QtGui.QPixmap]:
+        """Like render_page, but None instead of rendering on a cache miss."""
         self.open()
-        key = (i, round(scale, 2))
-        if key in self._pix_cache:
-            return self._pix_cache[key]
-        page = self.doc.load_page(i)
-        pm = page.get_pixmap(matrix=fitz.Matrix(scale, scale))
-        fmt = QtGui.QImage.Format_RGBA8888 if pm.alpha else QtGui.QImage.Format_RGB888
-        img = QtGui.QImage(pm.samples, pm.width, pm.height, pm.stride, fmt)
-        pix = QtGui.QPixmap.fromImage(img)
-        self._pix_cache[key] = pix
-        self.pageRendered.emit(i)
+        target = scale * dpr
+        level = self._cached_level(i, target)
+        if count:
+            metrics.counter("render_cache.hit" if level is not None else "render_cache.miss").inc()
+        if level is None:
+            return None
+        key = (i, level)
+        pix = self._pix_cache[key] = self._pix_cache.pop(key)   # most recent last
+        w, h = self.page_size(i)
+        size = QtCore.QSize(max(1, round(w * target)), max(1, round(h * target)))
+        if abs(pix.width() - size.width()) > 1 or abs(pix.height() - size.height()) > 1:
+            with span("scale_page", "pdf", page=i), metrics.timer("pdf.scale_page_ms"):
+                pix = pix.scaled(size, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation)
+        else:
+            pix = QtGui.QPixmap(pix)   # shared data; the cached one keeps its ratio
+        pix.setDevicePixelRatio(dpr)
         return pix
 
+    def has_raster(self, i: int, scale: float, dpr: float = 1.0) -> bool:
+        return self._cached_level(i, scale * dpr) is not None
+
+    def add_raster(self, i: int, level: float, img) -> None:
+        """Cache a raster of page ``i`` made at ``level`` (QPixmap or QImage)."""
+        pix = img if isinstance(img, QtGui.QPixmap) else QtGui.QPixmap.fromImage(img)
+        self._pix_cache[(i, level)] = pix
+        self.pageRendered.emit(i)
+
+    def _cached_level(self, i: int, target: float) -> Optional[float]:
+        best = None
+        for p, level in self._pix_cache:
+            if p == i and target / _LEVEL_SLACK <= level <= target * RENDER_REUSE_MAX and (best is None or level < best):
+                best = level
+        return best
+
+    def _rasterize(self, i: int, level: float) -> QtGui.QPixmap:
+        import fitz
+        with span("render_page", "pdf", page=i, scale=level), metrics.timer("pdf.render_page_ms"):
+            with FITZ_LOCK:
+                pm = self.doc.load_page(i).get_pixmap(matrix=fitz.Matrix(level, level))
+            fmt = QtGui.QImage.Format_RGBA8888 if pm.alpha else QtGui.QImage.Format_RGB888
+            img = QtGui.QImage(pm.samples, pm.width, pm.height, pm.stride, fmt)
+            return QtGui.QPixmap.fromImage(img)
+
+    def memory_bytes(self) -> int:
+        """Rough size of the caches; rendered pages dominate."""
+        pix = sum(p.width() * p.height() * p.depth() // 8 for p in self._pix_cache.values())
+        text = sum(len(t) for t in self._text_cache.values())
+        words = sum(len(ws) for ws in self._words_cache.values()) * WORD_BYTES
+        return pix + text + words
+
+    def trim_pixmaps(self, max_bytes: int, keep: int = 0) -> None:
+        """Drop the least recently used pages until the pixmaps fit in
+        ``max_bytes``, but keep the ``keep`` most recent ones."""
+        sizes = [(k, p.width() * p.height() * p.depth() // 8) for k, p in self._pix_cache.items()]
+        total = sum(n for _k, n in sizes)
+        for k, n in sizes[:max(0, len(sizes) - keep)]:
+            if total <= max_bytes:
+                break
+            del self._pix_cache[k]
+            total -= n
+
     def cover_thumb(self, max_w=200) -> QtGui.QIcon:
-        try:
-            CACHE_DIR.mkdir(parents=True, exist_ok=True)
-            out = CACHE_DIR / (slugify(str(self.path)) + f"_{max_w}.png")
-            if out.exists():
-                return QtGui.QIcon(str(out))
-            self.open()
-            pm = self.doc.load_page(0).get_pixmap(matrix=fitz.Matrix(0.5, 0.5))
-            ratio = max_w / pm.width
-            pm = self.doc.load_page(0).get_pixmap(matrix=fitz.Matrix(ratio, ratio))
-            img = QtGui.QImage(pm.samples, pm.width, pm.height, pm.stride,
-                               QtGui.QImage.Format_RGBA8888 if pm.alpha else QtGui.QImage.Format_RGB888)
-            img.save(str(out))
-            return QtGui.QIcon(str(out))
-        except Exception:
-            return QtGui.QIcon()
+        img = render_cover(self.path, max_w)
+        return QtGui.QIcon(QtGui.QPixmap.fromImage(img)) if not img.isNull() else QtGui.QIcon()
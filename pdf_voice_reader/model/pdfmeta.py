@@ -0,0 +1,52 @@
+"""Metadata extraction for one PDF.
+
+Kept free of Qt and of the rest of the package so that process-pool workers
+only import fitz, and fitz itself is imported on first use so that importing
+this module from the GUI stays cheap. Spawned workers also re-run the
+launching script as ``__mp_main__``; gui.py imports the app under its
+``__main__`` guard only, so that stays cheap too.
+"""
+from __future__ import annotations
+
+TEXT_PROBE_PAGES = 5      # pages sampled for the text-layer check
+TEXT_MIN_CHARS   = 40     # characters on a sampled page that count as text
+
+
+def extract_metadata(path: str) -> dict:
+    """Page count, document info, outline depth and text-layer presence.
+
+    Never raises: failures come back as ``{"path": ..., "error": "..."}``.
+    """
+    import fitz
+    try:
+        doc = fitz.open(path)
+    except Exception as e:
+        return {"path": path, "error": f"{type(e).__name__}: {e}"}
+    try:
+        info = doc.metadata or {}
+        n = len(doc)
+        try:
+            toc = doc.get_toc(simple=True)
+        except Exception:
+            toc = []
+        probe = sorted({int(k * (n - 1) / max(1, TEXT_PROBE_PAGES - 1)) for k in range(TEXT_PROBE_PAGES)}) if n else []
+        has_text = False
+        for i in probe:
+            if len(doc.load_page(i).get_text("text").strip()) >= TEXT_MIN_CHARS:
+                has_text = True
+                break
+        return {
+            "path": path,
+            "pages": n,
+            "title": (info.get("title") or "").strip(),
+            "author": (info.get("author") or "").strip(),
+            "subject": (info.get("subject") or "").strip(),
+            "keywords": (info.get("keywords") or "").strip(),
+            "outline_depth": max((lvl for lvl, *_ in toc), default=0),
+            "has_text": has_text,
+            "encrypted": bool(doc.is_encrypted),
+        }
+    except Exception as e:
+        return {"path": path, "error": f"{type(e).__name__}: {e}"}
+    finally:
+        doc.close()
@@ -0,0 +1,53 @@
+"""Text-only PDF access, free of Qt (the terminal reader uses it as is)."""
+from __future__ import annotations
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional
+from ..metrics import metrics
+from ..tracing import span
+
+if TYPE_CHECKING:
+    import fitz
+
+# MuPDF is not thread-safe; every fitz call that may run off the GUI thread
+# (cover workers) and every GUI-thread call is serialized through this lock.
+FITZ_LOCK = threading.RLock()
+
+
+def extract_page_text(doc: fitz.Document, i: int) -> str:
+    """Text of page ``i`` as it is read aloud."""
+    with span("page_text", "pdf", page=i), metrics.timer("pdf.page_text_ms"), FITZ_LOCK:
+        return doc.load_page(i).get_text("text").strip()
+
+
+class TextDoc:
+    """The text side of PDFDoc: open, page count and cached page text."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.doc: Optional[fitz.Document] = None
+        self.page_count = 0
+        self._text_cache: Dict[int, str] = {}
+
+    def open(self):
+        if self.doc:
+            return
+        import fitz
+        with span("open", "pdf"), FITZ_LOCK:
+            self.doc = fitz.open(self.path)
+            self.page_count = len(self.doc)
+
+    def close(self):
+        if self.doc:
+            with FITZ_LOCK:
+                self.doc.close()
+            self.doc = None
+            self.page_count = 0
+            self._text_cache.clear()
+
+    def page_text(self, i: int) -> str:
+        self.open()
+        text = self._text_cache.get(i)
+        if text is None:
+            text = self._text_cache[i] = extract_page_text(self.doc, i)
+        return text
@@ -0,0 +1,212 @@
+from __future__ import annotations
+import multiprocessing, threading
+from collections import OrderedDict, deque
+from multiprocessing import connection, shared_memory
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from PySide6 import QtCore, QtGui
+from ..config import RENDER_PROCESSES
+from ..metrics import metrics
+
+SLOT_BYTES  = 8 * 1024 * 1024   # initial raster buffer per worker; grown on demand
+WORKER_DOCS = 8                 # documents each worker keeps open
+MAX_TRIES   = 2                 # a page that crashes this many workers is reported failed
+
+Key = Tuple[str, int, float]    # (path, page, level)
+
+
+def _worker_main(conn, slot_name: str) -> None:
+    """Render requests one at a time into the shared slot; runs in a child process."""
+    import fitz
+    # children share the parent's resource tracker, so attaching here does not
+    # make the segment the worker's: the parent unlinks it
+    slot = shared_memory.SharedMemory(slot_name)
+    docs: "OrderedDict[str, fitz.Document]" = OrderedDict()
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+        if msg[0] == "slot":
+            slot.close()
+            slot = shared_memory.SharedMemory(msg[1])
+            continue
+        path, page, level = msg
+        try:
+            doc = docs.pop(path, None) or fitz.open(path)
+            docs[path] = doc
+            while len(docs) > WORKER_DOCS:
+                docs.popitem(last=False)[1].close()
+            pm = doc.load_page(page).get_pixmap(matrix=fitz.Matrix(level, level))
+            data = pm.samples_mv
+            if len(data) > slot.size:
+                conn.send(("grow", len(data)))
+                continue
+            slot.buf[:len(data)] = data
+            conn.send(("ok", (pm.width, pm.height, pm.stride, bool(pm.alpha), len(data))))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+    slot.close()
+
+
+class _Worker:
+    def __init__(self, ctx, slot: shared_memory.SharedMemory):
+        self.slot = slot
+        self.conn, child = ctx.Pipe()
+        self.proc = ctx.Process(target=_worker_main, args=(child, slot.name), daemon=True)
+        self.proc.start()
+        child.close()
+        self.job: Optional[Key] = None
+
+
+class RenderFarm(QtCore.QObject):
+    """Renders pages in worker processes, each with its own open documents.
+
+    Rasters come back through a shared-memory slot per worker rather than
+    being pickled; a worker that dies is replaced and its page retried once.
+    Results arrive as QImages on the GUI thread.
+    """
+    rendered = QtCore.Signal(str, int, float, QtGui.QImage)   # path, page, level, image
+    failed   = QtCore.Signal(str, int, float, str)
+
+    def __init__(self, workers: int = RENDER_PROCESSES, parent=None):
+        super().__init__(parent)
+        self.workers = max(1, int(workers))
+        self._ctx = multiprocessing.get_context("spawn")   # never fork a process that runs Qt
+        self._lock = threading.Lock()
+        self._urgent: Deque[Key] = deque()   # pages on screen, served first
+        self._queue: Deque[Key] = deque()
+        self._queued: Set[Key] = set()
+        self._tries: Dict[Key, int] = {}
+        self._pool: List[_Worker] = []
+        self._wake_r, self._wake_w = self._ctx.Pipe(duplex=False)
+        self._thread: Optional[threading.Thread] = None
+        self._quit = False
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._quit = False
+        self._pool = [_Worker(self._ctx, shared_memory.SharedMemory(create=True, size=SLOT_BYTES))
+                      for _ in range(self.workers)]
+        self._thread = threading.Thread(target=self._run, name="render-farm", daemon=True)
+        self._thread.start()
+
+    def request(self, path: str, page: int, level: float, urgent: bool = False) -> None:
+        key = (str(path), int(page), float(level))
+        with self._lock:
+            if key in self._queued or any(w.job == key for w in self._pool):
+                return
+            self._queued.add(key)
+            (self._urgent if urgent else self._queue).append(key)
+        self.start()
+        self._wake()
+
+    def cancel(self, path: Optional[str] = None) -> None:
+        """Drop queued (not yet running) requests, for ``path`` or all."""
+        with self._lock:
+            for q in (self._urgent, self._queue):
+                keep = [k for k in q if path is not None and k[0] != str(path)]
+                q.clear()
+                q.extend(keep)
+            self._queued = set(self._urgent) | set(self._queue)
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._urgent) + len(self._queue) + sum(1 for w in self._pool if w.job)
+
+    def shutdown(self) -> None:
+        if self._thread is None:
+            return
+        self._quit = True
+        self._wake()
+        self._thread.join(timeout=2.0)
+        self._thread = None
+        for w in self._pool:
+            try:
+                w.conn.send(None)
+            except OSError:
+                pass
+        for w in self._pool:
+            w.proc.join(timeout=1.0)
+            if w.proc.is_alive():
+                w.proc.terminate()
+            w.slot.close()
+            w.slot.unlink()
+        self._pool = []
+
+    def _wake(self) -> None:
+        try:
+            self._wake_w.send_bytes(b"")
+        except OSError:
+            pass
+
+    # ----- dispatcher thread -----
+    def _run(self) -> None:
+        while not self._quit:
+            with self._lock:
+                for w in self._pool:
+                    q = self._urgent or self._queue
+                    if w.job is None and q:
+                        w.job = q.popleft()
+                        self._queued.discard(w.job)
+                        try:
+                            w.conn.send(w.job)
+                        except OSError:
+                            pass   # died; its sentinel brings the job back
+
+            waitables = [self._wake_r] + [w.conn for w in self._pool] + [w.proc.sentinel for w in self._pool]
+            for r in connection.wait(waitables, timeout=1.0):
+                if r is self._wake_r:
+                    while self._wake_r.poll():
+                        self._wake_r.recv_bytes()
+                    continue
+                for k, w in enumerate(self._pool):
+                    if r is w.conn:
+                        self._receive(w)
+                    elif r == w.proc.sentinel and not w.proc.is_alive():
+                        self._respawn(k)
+
+    def _receive(self, w: _Worker) -> None:
+        try:
+            status, payload = w.conn.recv()
+        except (EOFError, OSError):
+            return   # the sentinel reports the death
+        key, w.job = w.job, None
+        if key is None:
+            return
+        if status == "ok":
+            width, height, stride, alpha, n = payload
+            fmt = QtGui.QImage.Format_RGBA8888 if alpha else QtGui.QImage.Format_RGB888
+            img = QtGui.QImage(w.slot.buf[:n], width, height, stride, fmt).copy()
+            self._tries.pop(key, None)
+            metrics.counter("render_farm.pages").inc()
+            self.rendered.emit(key[0], key[1], key[2], img)
+        elif status == "grow":
+            old = w.slot
+            w.slot = shared_memory.SharedMemory(create=True, size=int(payload * 1.25))
+            w.conn.send(("slot", w.slot.name))
+            old.close()
+            old.unlink()
+            self._retry(key)
+        else:
+            self.failed.emit(key[0], key[1], key[2], payload)
+
+    def _respawn(self, k: int) -> None:
+        dead = self._pool[k]
+        metrics.counter("render_farm.respawns").inc()
+        dead.conn.close()
+        self._pool[k] = _Worker(self._ctx, dead.slot)
+        key = dead.job
+        if key is not None:
+            self._tries[key] = self._tries.get(key, 0) + 1
+            if self._tries[key] >= MAX_TRIES:
+                self._tries.pop(key)
+                self.failed.emit(key[0], key[1], key[2], "crashed the renderer")
+            else:
+                self._retry(key)
+
+    def _retry(self, key: Key) -> None:
+        with self._lock:
+            if key not in self._queued:
+                self._queued.add(key)
+                self._urgent.appendleft(key)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+import bisect, re
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from .library import Entry
+
+_TOKEN = re.compile(r"[^\W_]+", re.UNICODE)
+
+# field weights, packed into the low bits of every posting
+F_TITLE, F_NAME, F_PATH, F_META = 0, 1, 2, 3
+_FIELD_WEIGHT = (3.0, 3.0, 1.5, 1.0)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _trigrams(tok: str) -> Set[str]:
+    t = f"  {tok} "
+    return {t[i:i + 3] for i in range(len(t) - 2)}
+
+
+class SearchIndex:
+    """Prefix index over library metadata, with trigram fuzzy matching.
+
+    Every token of the title, file name, path components and author/subject
+    maps to a posting array of ``doc << 2 | field``. A query term matches all
+    tokens it prefixes (binary search over the sorted vocabulary) and, from
+    three letters on, the tokens containing it (found through the trigram
+    lists, ranked below prefixes); terms with neither fall back to vocabulary
+    tokens with similar trigrams, so typos still find something. All terms
+    must match; results are ranked.
+    """
+
+    def __init__(self, entries: Sequence[Entry] = (), root: Optional[Path] = None):
+        self.entries: List[Entry] = list(entries)
+        self._vocab: List[str] = []
+        self._postings: List[array] = []
+        self._tri: Dict[str, List[int]] = {}
+        self._build(root)
+
+    def _build(self, root: Optional[Path]):
+        post: Dict[str, array] = defaultdict(lambda: array("I"))
+        for doc, e in enumerate(self.entries):
+            p = Path(e.path)
+            try:
+                rel = p.parent.relative_to(root) if root else p.parent
+            except ValueError:
+                rel = p.parent
+            fields = (
+                (F_TITLE, e.title),
+                (F_NAME, p.stem),
+                (F_PATH, " ".join(rel.parts)),
+                (F_META, " ".join(str(e.meta.get(k, "")) for k in ("author", "subject", "keywords"))),
+            )
+            seen: Set[Tuple[str, int]] = set()
+            for f, text in fields:
+                for tok in tokenize(text):
+                    if (tok, f) not in seen:
+                        seen.add((tok, f))
+                        post[tok].append(doc << 2 | f)
+        self._vocab = sorted(post)
+        self._postings = [post[t] for t in self._vocab]
+        tri: Dict[str, List[int]] = defaultdict(list)
+        for ti, tok in enumerate(self._vocab):
+            for g in _trigrams(tok):
+                tri[g].append(ti)
+        self._tri = tri
+
+    def _fuzzy_tokens(self, term: str, min_sim: float = 0.3) -> List[Tuple[int, float]]:
+        grams = _trigrams(term)
+        hits: Dict[int, int] = defaultdict(int)
+        for g in grams:
+            for ti in self._tri.get(g, ()):
+                hits[ti] += 1
+        out = []
+        for ti, shared in hits.items():
+            sim = shared / (len(grams) + len(_trigrams(self._vocab[ti])) - shared)
+            if sim >= min_sim:
+                out.append((ti, sim))
+        return out
+
+    def _infix_tokens(self, term: str) -> List[int]:
+        """Tokens that contain ``term`` past their first letter (len(term) >= 3)."""
+        lists = sorted((self._tri.get(term[i:i + 3], ()) for i in range(len(term) - 2)), key=len)
+        if not lists[0]:
+            return []
+        cand = set(lists[0]).intersection(*lists[1:])
+        return [ti for ti in cand if term in self._vocab[ti][1:]]
+
+    def _term_scores(self, term: str) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        lo = bisect.bisect_left(self._vocab, term)
+        hi = bisect.bisect_left(self._vocab, term + "\uffff")
+        matches = [(ti, 2.0 if self._vocab[ti] == term else 1.0) for ti in range(lo, hi)]
+        if len(term) >= 3:
+            matches += [(ti, 0.8) for ti in self._infix_tokens(term)]
+        if not matches and len(term) >= 3:
+            matches = [(ti, sim) for ti, sim in self._fuzzy_tokens(term)]
+        for ti, quality in matches:
+            for p in self._postings[ti]:
+                doc, s = p >> 2, quality * _FIELD_WEIGHT[p & 3]
+                if s > scores.get(doc, 0.0):
+                    scores[doc] = s
+        return scores
+
+    def search(self, query: str) -> Optional[List[Entry]]:
+        """Ranked matches for ``query``; None for an empty query (show all)."""
+        terms = tokenize(query)
+        if not terms:
+            return None
+        total: Optional[Dict[int, float]] = None
+        for term in sorted(set(terms), key=len, reverse=True):
+            sc = self._term_scores(term)
+            if total is None:
+                total = sc
+            else:
+                total = {d: total[d] + s for d, s in sc.items() if d in total}
+            if not total:
+                return []
+        ranked = sorted(total.items(), key=lambda kv: (-kv[1], self.entries[kv[0]].path))
+        return [self.entries[d] for d, _ in ranked]
@@ -0,0 +1,73 @@
+from __future__ import annotations
+import sqlite3, threading, time
+from pathlib import Path
+from typing import NamedTuple, Optional
+from ..config import SESSIONS_DB
+
+
+class Session(NamedTuple):
+    page: int = 0                   # first visible page (0-based)
+    offset: float = 0.0             # scrolled into that page, as a fraction of its height
+    zoom: float = 1.2
+    fit: Optional[str] = "width"    # 'width', 'page' or None (free zoom)
+    read_page: int = -1             # page of the chunk being read, -1 if none
+    read_word: int = 0              # that chunk's first word (index into page_words)
+
+
+class SessionStore:
+    """Per-document reading sessions, keyed by content fingerprint so that a
+    moved or renamed book keeps its place. Each row may also hold a JPEG of
+    the first screen, shown while the document itself is being opened."""
+
+    def __init__(self, db_path: Path = SESSIONS_DB):
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+
+    def _db(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            con = sqlite3.connect(str(self.db_path), timeout=10)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " fp TEXT PRIMARY KEY, path TEXT NOT NULL, page INTEGER NOT NULL,"
+                " offset REAL NOT NULL, zoom REAL NOT NULL, fit TEXT,"
+                " read_page INTEGER NOT NULL, read_word INTEGER NOT NULL,"
+                " updated REAL NOT NULL, raster BLOB)"
+            )
+            cols = {r[1] for r in con.execute("PRAGMA table_info(sessions)")}
+            if "read_chunk" in cols:
+                # older rows counted chunks from the page start; that does not
+                # map to a word, so they resume at the start of the page
+                con.execute("ALTER TABLE sessions RENAME COLUMN read_chunk TO read_word")
+                con.execute("UPDATE sessions SET read_word=0")
+                con.commit()
+            self._local.con = con
+        return con
+
+    def get(self, fp: str) -> Optional[Session]:
+        row = self._db().execute(
+            "SELECT page, offset, zoom, fit, read_page, read_word FROM sessions WHERE fp=?", (fp,)
+        ).fetchone()
+        return Session(*row) if row else None
+
+    def raster(self, fp: str) -> Optional[bytes]:
+        row = self._db().execute("SELECT raster FROM sessions WHERE fp=?", (fp,)).fetchone()
+        return row[0] if row and row[0] else None
+
+    def put(self, fp: str, path: Path, s: Session, raster: Optional[bytes] = None) -> None:
+        """Store ``s``; the saved raster is kept unless a new one is given."""
+        con = self._db()
+        con.execute(
+            "INSERT INTO sessions (fp, path, page, offset, zoom, fit, read_page, read_word, updated, raster)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT(fp) DO UPDATE SET path=excluded.path, page=excluded.page,"
+            " offset=excluded.offset, zoom=excluded.zoom, fit=excluded.fit,"
+            " read_page=excluded.read_page, read_word=excluded.read_word,"
+            " updated=excluded.updated, raster=COALESCE(excluded.raster, sessions.raster)",
+            (fp, str(path), s.page, s.offset, s.zoom, s.fit, s.read_page, s.read_word,
+             time.time(), sqlite3.Binary(raster) if raster else None),
+        )
+        con.commit()
@@ -0,0 +1,121 @@
+from __future__ import annotations
+import os, sqlite3, threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from ..config import THUMB_DB
+from ..util import file_fingerprint
+
+
+class ThumbStore:
+    """Cover thumbnails packed in one SQLite file.
+
+    Rows are keyed by (path, width) and only valid while the file's size and
+    mtime match. On a miss the content fingerprint is tried, so moved or
+    touched-but-unchanged files reuse their cover instead of re-rendering.
+    Connections are per thread, so workers can read and write concurrently.
+    """
+
+    def __init__(self, db_path: Path = THUMB_DB):
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            con = sqlite3.connect(str(self.db_path), timeout=10)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS thumbs ("
+                " path TEXT NOT NULL, width INTEGER NOT NULL, size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL, fp TEXT, data BLOB NOT NULL,"
+                " PRIMARY KEY (path, width))"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS thumbs_fp ON thumbs (fp, width)")
+            self._local.con = con
+        return con
+
+    def get(self, path: Path, width: int) -> Optional[bytes]:
+        key = str(path)
+        try:
+            st = os.stat(key)
+        except OSError:
+            return None
+        row = self._db().execute(
+            "SELECT size, mtime_ns, data FROM thumbs WHERE path=? AND width=?", (key, width)
+        ).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+        try:
+            fp = file_fingerprint(Path(key), st.st_size)
+        except OSError:
+            return None
+        row = self._db().execute(
+            "SELECT data FROM thumbs WHERE fp=? AND width=? LIMIT 1", (fp, width)
+        ).fetchone()
+        if row:
+            self._upsert(key, width, st.st_size, st.st_mtime_ns, fp, row[0])
+            self._rekey_moved(fp, key)
+            return row[0]
+        return None
+
+    def _rekey_moved(self, fp: str, key: str) -> None:
+        """Move the rows of files with this fingerprint that no longer exist
+        (the file was moved or renamed) over to ``key``, other widths too."""
+        paths = {p for (p,) in self._db().execute("SELECT path FROM thumbs WHERE fp=?", (fp,))}
+        gone = [(key, p) for p in paths if p != key and not os.path.exists(p)]
+        if gone:
+            with self._write_lock:
+                con = self._db()
+                con.executemany("UPDATE OR REPLACE thumbs SET path=? WHERE path=?", gone)
+                con.commit()
+
+    def get_many(self, paths: Iterable[Path], width: int) -> Dict[str, bytes]:
+        """Every still-valid cover among ``paths``, in one read per 500 paths."""
+        wanted = list({str(p) for p in paths})
+        out: Dict[str, bytes] = {}
+        for i in range(0, len(wanted), 500):
+            part = wanted[i:i + 500]
+            rows = self._db().execute(
+                "SELECT path, size, mtime_ns, data FROM thumbs WHERE width=? AND path IN (%s)"
+                % ",".join("?" * len(part)), (width, *part)
+            ).fetchall()
+            for path, size, mtime_ns, data in rows:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if st.st_size == size and st.st_mtime_ns == mtime_ns:
+                    out[path] = data
+        return out
+
+    def put(self, path: Path, width: int, data: bytes) -> None:
+        key = str(path)
+        try:
+            st = os.stat(key)
+            fp = file_fingerprint(Path(key), st.st_size)
+        except OSError:
+            return
+        self._upsert(key, width, st.st_size, st.st_mtime_ns, fp, data)
+
+    def _upsert(self, path: str, width: int, size: int, mtime_ns: int, fp: str, data: bytes) -> None:
+        with self._write_lock:
+            con = self._db()
+            con.execute(
+                "INSERT OR REPLACE INTO thumbs (path, width, size, mtime_ns, fp, data)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (path, width, size, mtime_ns, fp, sqlite3.Binary(data)),
+            )
+            con.commit()
+
+
+_STORE: Optional[ThumbStore] = None
+
+
+def thumb_store() -> ThumbStore:
+    global _STORE
+    if _STORE is None:
+        _STORE = ThumbStore()
+    return _STORE
@@ -0,0 +1,54 @@
+"""Startup phase timings.
+
+Enable with ``--startup-profile`` or ``PDF_VOICE_READER_PROFILE=1``; the
+report goes to stderr once deferred startup work has finished.
+"""
+from __future__ import annotations
+import os, sys, time
+from typing import List, Optional, Tuple
+from .config import STARTUP_TARGET_MS
+
+_T0 = time.perf_counter()   # as early as possible: app.py imports this first
+
+FLAG = "--startup-profile"
+
+
+class StartupProfile:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.marks: List[Tuple[str, float]] = []
+        self.first_paint_ms: Optional[float] = None
+        self._reported = False
+
+    def mark(self, phase: str) -> None:
+        """Record that ``phase`` has just finished."""
+        if self.enabled:
+            self.marks.append((phase, (time.perf_counter() - _T0) * 1000.0))
+
+    def painted(self) -> None:
+        if self.first_paint_ms is None:
+            self.first_paint_ms = (time.perf_counter() - _T0) * 1000.0
+            self.mark("first paint")
+
+    def report(self, out=None) -> None:
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        out = out or sys.stderr
+        prev = 0.0
+        print("startup profile (ms)      phase    total", file=out)
+        for name, t in self.marks:
+            print(f"  {name:<22} {t - prev:8.1f} {t:8.1f}", file=out)
+            prev = t
+        if self.first_paint_ms is not None:
+            verdict = "ok" if self.first_paint_ms <= STARTUP_TARGET_MS else "OVER TARGET"
+            print(f"  first paint {self.first_paint_ms:.0f} ms (target {STARTUP_TARGET_MS} ms) {verdict}", file=out)
+
+
+profile = StartupProfile()
+
+
+def enable_from(argv: List[str]) -> List[str]:
+    """Turn the profile on from ``argv``/environment; returns argv without the flag."""
+    profile.enabled = FLAG in argv or os.environ.get("PDF_VOICE_READER_PROFILE", "") not in ("", "0")
+    return [a for a in argv if a != FLAG]
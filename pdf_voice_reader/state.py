@@ -0,0 +1,95 @@
+from __future__ import annotations
+import json, os, tempfile, threading
+from pathlib import Path
+from typing import Optional
+from PySide6 import QtCore
+from .config import STATE_FILE, STATE_SAVE_DELAY_MS
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """Write ``text`` to a temp file next to ``path`` and rename it into place."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class StateStore(QtCore.QObject):
+    """App state as a dict, persisted in the background.
+
+    ``save()`` only marks the state dirty; changes within the debounce window
+    are written together by a writer thread (a newer snapshot replaces one
+    that has not been written yet). ``flush()`` writes synchronously and is
+    called on exit.
+    """
+
+    def __init__(self, path: Path = STATE_FILE, delay_ms: int = STATE_SAVE_DELAY_MS, parent=None):
+        super().__init__(parent)
+        self.path = Path(path)
+        self.data: dict = self._load()
+        self.write_count = 0
+        self._cv = threading.Condition()
+        self._pending: Optional[str] = None   # snapshot waiting for the writer
+        self._writing = False
+        self._writer: Optional[threading.Thread] = None
+        self._timer = QtCore.QTimer(self, singleShot=True, interval=delay_ms)
+        self._timer.timeout.connect(self._snapshot)
+        app = QtCore.QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.flush)
+
+    def _load(self) -> dict:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def save(self) -> None:
+        self._timer.start()
+
+    def _snapshot(self) -> None:
+        text = json.dumps(self.data, indent=2)
+        with self._cv:
+            self._pending = text
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, daemon=True)
+                self._writer.start()
+            self._cv.notify_all()
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._cv:
+                while self._pending is None:
+                    self._cv.wait()
+                text, self._pending = self._pending, None
+                self._writing = True
+            try:
+                write_atomic(self.path, text)
+                with self._cv:
+                    self.write_count += 1
+            except OSError:
+                pass
+            finally:
+                with self._cv:
+                    self._writing = False
+                    self._cv.notify_all()
+
+    def flush(self) -> None:
+        """Write any unsaved change now and wait until it is on disk."""
+        if self._timer.isActive():
+            self._timer.stop()
+            self._snapshot()
+        with self._cv:
+            while self._pending is not None or self._writing:
+                self._cv.wait()
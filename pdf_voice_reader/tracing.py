@@ -0,0 +1,114 @@
+"""Span tracing exported as Chrome trace-event JSON (open it in Perfetto or
+chrome://tracing).
+
+Off by default: ``span()`` then returns one shared no-op context manager, so
+an instrumented call costs an attribute check. Switch it on at runtime
+(View → Record Trace) or from the start with ``PDF_VOICE_READER_TRACE=<file>``.
+"""
+from __future__ import annotations
+import functools, json, os, threading, time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Optional
+
+MAX_EVENTS = 500_000   # oldest events are dropped beyond this
+TRACE_ENV = "PDF_VOICE_READER_TRACE"
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "t0")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: Optional[dict]):
+        self.tracer, self.name, self.cat, self.args = tracer, name, cat, args
+
+    def __enter__(self):
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        t1 = time.perf_counter_ns()
+        self.tracer._add("X", self.name, self.cat, self.t0, t1 - self.t0, self.args)
+        return False
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self._events: Deque[dict] = deque(maxlen=MAX_EVENTS)
+        self._threads: Dict[int, str] = {}
+        self._pid = os.getpid()
+        self._epoch = time.perf_counter_ns()
+
+    def start(self) -> None:
+        self.enabled = True
+
+    def stop(self) -> None:
+        self.enabled = False
+
+    def clear(self) -> None:
+        self._events.clear()
+        self._threads.clear()
+
+    def span(self, name: str, cat: str = "app", **args):
+        """Context manager timing ``name`` on the calling thread."""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name, cat, args or None)
+
+    def instant(self, name: str, cat: str = "app", **args) -> None:
+        if self.enabled:
+            self._add("i", name, cat, time.perf_counter_ns(), None, args or None)
+
+    def _add(self, ph: str, name: str, cat: str, t0: int, dur: Optional[int], args: Optional[dict]) -> None:
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        ev = {"ph": ph, "name": name, "cat": cat, "pid": self._pid, "tid": tid,
+              "ts": (t0 - self._epoch) / 1000.0}
+        if dur is not None:
+            ev["dur"] = dur / 1000.0
+        else:
+            ev["s"] = "t"
+        if args:
+            ev["args"] = args
+        self._events.append(ev)   # deque.append is atomic
+
+    def export(self, path: Path) -> int:
+        """Write the recorded events; returns how many were written."""
+        events = list(self._events)
+        meta = [{"ph": "M", "name": "thread_name", "pid": self._pid, "tid": tid, "args": {"name": name}}
+                for tid, name in list(self._threads.items())]
+        meta.append({"ph": "M", "name": "process_name", "pid": self._pid, "tid": 0,
+                     "args": {"name": "pdf_voice_reader"}})
+        Path(path).write_text(json.dumps({"traceEvents": meta + events, "displayTimeUnit": "ms"}))
+        return len(events)
+
+
+tracer = Tracer()
+span = tracer.span
+
+
+def traced(name: str, cat: str = "app"):
+    """Decorator form of ``span``."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            if not tracer.enabled:
+                return fn(*a, **kw)
+            with _Span(tracer, name, cat, None):
+                return fn(*a, **kw)
+        return wrapper
+    return deco
@@ -1,10 +1,13 @@
 from __future__ import annotations
-import shutil, hashlib, json
+import shutil, hashlib, json, re
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, List, Sequence, Tuple
 from .config import DEFAULT_LIB, VOICE_DIRS
-from PySide6 import QtGui, QtWidgets
 from .config import THEMES
+# PySide is imported inside the theme helpers only: the terminal reader
+# (cli.py) uses the text helpers here without loading Qt.
+if TYPE_CHECKING:
+    from PySide6 import QtWidgets
 
 def ensure_cmd(cmd: str) -> None:
     import shutil
@@ -32,6 +35,19 @@ def slugify(s: str) -> str:
     return f"{base[:50]}_{h}" if base else h
 
 
+def file_fingerprint(path: Path, size: int | None = None, block: int = 1 << 16) -> str:
+    """Content fingerprint (size + head + tail) that survives moves and renames."""
+    p = Path(path)
+    size = p.stat().st_size if size is None else size
+    h = hashlib.sha1(str(size).encode())
+    with open(p, "rb") as f:
+        h.update(f.read(block))
+        if size > 2 * block:
+            f.seek(-block, 2)
+            h.update(f.read(block))
+    return h.hexdigest()
+
+
 def chunk_text(text: str, target_len: int = 420) -> List[str]:
     """Small chunks (~2–5s) so pause/stop feel instant and resume is sane."""
     text = text.strip()
@@ -62,6 +78,50 @@ def chunk_text(text: str, target_len: int = 420) -> List[str]:
     return out
 
 
+def chunk_words(words: Sequence[str], target_len: int = 420) -> List[Tuple[int, int]]:
+    """chunk_text over a list of words: the (first, last) word of every chunk,
+    whose text is then ``" ".join(words[first:last + 1])``."""
+    sents: List[Tuple[int, int, int]] = []   # first word, last word, characters
+    a, n = 0, -1
+    for j, w in enumerate(words):
+        n += len(w) + 1
+        if w.endswith(('.', '!', '?')):
+            sents.append((a, j, n))
+            a, n = j + 1, -1
+    if a < len(words):
+        sents.append((a, len(words) - 1, n))
+    out: List[Tuple[int, int]] = []
+    cur: List[int] = []
+    n = 0
+    for a, b, size in sents:
+        if n + size <= target_len or not cur:
+            cur = [cur[0] if cur else a, b]
+            n += size + 1
+        else:
+            out.append((cur[0], cur[1]))
+            cur = [a, b]
+            n = size
+    if cur:
+        out.append((cur[0], cur[1]))
+    return out
+
+
+def word_starts(text: str) -> List[int]:
+    """Character offset of every word in a chunk."""
+    return [m.start() for m in re.finditer(r"\S+", text)]
+
+
+def sentence_starts(text: str) -> List[int]:
+    """Character offset of every sentence in a chunk (same rule as chunk_text)."""
+    out = [0]
+    for m in re.finditer(r"[.!?](?= +\S)", text):
+        j = m.end()
+        while j < len(text) and text[j] == " ":
+            j += 1
+        out.append(j)
+    return out
+
+
 def validate_piper_model(onnx_path: str) -> None:
     onnx = Path(onnx_path).expanduser()
     if not onnx.exists():
@@ -75,6 +135,15 @@ def validate_piper_model(onnx_path: str) -> None:
         raise ValueError(f"Invalid Piper JSON: {cfg}Tip: re-download with curl -L and ?download=true.{e}")
 
 
+def piper_sample_rate(onnx_path: str, default: int = 22050) -> int:
+    cfg = Path(onnx_path).expanduser()
+    cfg = cfg.with_suffix(cfg.suffix + ".json")
+    try:
+        return int(json.load(open(cfg, "r", encoding="utf-8"))["audio"]["sample_rate"])
+    except Exception:
+        return default
+
+
 def scan_voice_models() -> List[str]:
     voices = []
     for d in VOICE_DIRS:
@@ -88,6 +157,7 @@ def scan_voice_models() -> List[str]:
 
 def _apply_palette(app: QtWidgets.QApplication, mode: str):
     """Set a sane base palette for the whole app."""
+    from PySide6 import QtGui
     if mode == "dark":
         pal = QtGui.QPalette()
         # Window surfaces
@@ -110,6 +180,7 @@ def _apply_palette(app: QtWidgets.QApplication, mode: str):
         app.setPalette(app.style().standardPalette())
 
 def _set_dark_palette(app: QtWidgets.QApplication):
+    from PySide6 import QtGui
     pal = QtGui.QPalette()
     pal.setColor(QtGui.QPalette.Window,            QtGui.QColor("#181c20"))
     pal.setColor(QtGui.QPalette.Base,              QtGui.QColor("#14181c"))
@@ -129,6 +200,7 @@ def apply_theme(window: QtWidgets.QWidget, theme_name: str):
     Reset palette & stylesheets first, then apply requested theme.
     This avoids 'dark colors sticking' when returning to light themes.
     """
+    from PySide6 import QtWidgets
     app = QtWidgets.QApplication.instance()
 
     # 1) FULL RESET
@@ -1,63 +1,346 @@
 from __future__ import annotations
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from PySide6 import QtCore, QtWidgets
-from ..model.pdfdoc import PDFDoc
+from typing import Dict, List, Optional, Set
+from PySide6 import QtCore, QtGui, QtWidgets
+from ..config import THUMB_WORKERS, ICON_CACHE_SIZE
+from ..metrics import metrics
+from ..tracing import span
+from ..model.library import Entry, LibraryCatalog
+from ..model.pdfdoc import render_cover
+from ..model.search import SearchIndex
+from ..model.thumbstore import thumb_store
+
+THUMB_W = 200
+PREFETCH_ROWS = 24   # rows beyond the viewport whose covers are requested too
+SEARCH_DEBOUNCE_MS = 150
+REINDEX_DELAY_MS = 2000   # metadata arriving in batches is indexed at most this often
+
+
+class _ThumbSignals(QtCore.QObject):
+    done = QtCore.Signal(int, str, QtGui.QImage)   # generation, path, cover
+
+
+class _ThumbTask(QtCore.QRunnable):
+    """Decodes (``data`` from the store) or renders one cover off the GUI thread."""
+    def __init__(self, gen: int, path: str, data: Optional[bytes], signals: _ThumbSignals):
+        super().__init__()
+        self.gen, self.path, self.data, self.signals = gen, path, data, signals
+
+    def run(self):
+        self.signals.done.emit(self.gen, self.path, render_cover(Path(self.path), THUMB_W, self.data))
+
+
+def _tooltip(e: Entry) -> str:
+    lines = [e.display_title]
+    if e.meta.get("author"):
+        lines.append(e.meta["author"])
+    if "error" in e.meta:
+        lines.append(f"Cannot be read: {e.meta['error']}")
+    elif e.pages >= 0:
+        info = [f"{e.pages} pages"]
+        if not e.meta.get("has_text", True):
+            info.append("no text layer")
+        if e.meta.get("encrypted"):
+            info.append("encrypted")
+        lines.append(" · ".join(info))
+    lines.append(e.path)
+    return "\n".join(lines)
+
+
+class LibraryModel(QtCore.QAbstractListModel):
+    """Library rows; covers are loaded only for rows that get painted or are
+    near the viewport, and kept in a bounded LRU of icons."""
+    PathRole = QtCore.Qt.UserRole
+
+    def __init__(self, placeholder: QtGui.QIcon, parent=None):
+        super().__init__(parent)
+        self._placeholder = placeholder
+        self._all: List[Entry] = []
+        self._rows: List[Entry] = []
+        self._row_of: Dict[str, int] = {}
+        self._icons: "OrderedDict[str, QtGui.QIcon]" = OrderedDict()
+        # most recently requested covers are rendered first
+        self._wanted: "OrderedDict[str, None]" = OrderedDict()
+        self._fresh: List[str] = []           # requested since the last bulk store read
+        self._cached: Dict[str, bytes] = {}   # stored covers of wanted paths
+        self._loading: Set[str] = set()       # covers with a task in the pool
+        self._failed: Set[str] = set()        # no cover could be made; placeholder stays
+        self._gen = 0
+        self._pool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(THUMB_WORKERS)
+        self._signals = _ThumbSignals(self)
+        self._signals.done.connect(self._on_thumb)
+
+    # ----- rows -----
+    def set_entries(self, entries: List[Entry], rows: Optional[List[Entry]] = None):
+        """Replace the entries and show ``rows`` of them (None: all), in one reset."""
+        self._all = entries
+        self.show_rows(rows)
+
+    def show_rows(self, rows: Optional[List[Entry]]):
+        """Show ``rows`` in the given order (None: everything), in one reset."""
+        self.beginResetModel()
+        self._rows = self._all if rows is None else rows
+        self._row_of = {e.path: i for i, e in enumerate(self._rows)}
+        self.endResetModel()
+
+    def update_entries(self, entries: List[Entry]):
+        """Swap in refreshed entries (same paths) without resetting the view."""
+        by_path = {e.path: e for e in entries}
+        self._all = [by_path.get(e.path, e) for e in self._all]
+        if self._rows is not self._all:
+            self._rows = [by_path.get(e.path, e) for e in self._rows]
+        else:
+            self._rows = self._all
+        self._failed.difference_update(by_path)   # changed files get another try
+        rows = [self._row_of[p] for p in by_path if p in self._row_of]
+        if rows:
+            roles = [QtCore.Qt.DisplayRole, QtCore.Qt.ToolTipRole]
+            self.dataChanged.emit(self.index(min(rows)), self.index(max(rows)), roles)
+
+    def path_at(self, row: int) -> str:
+        return self._rows[row].path
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index: QtCore.QModelIndex, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        e = self._rows[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            return e.display_title
+        if role == QtCore.Qt.DecorationRole:
+            icon = self._icons.get(e.path)
+            if icon is not None:
+                self._icons.move_to_end(e.path)
+                return icon
+            if e.path not in self._failed:
+                self.request(e.path)
+            return self._placeholder
+        if role == QtCore.Qt.ToolTipRole:
+            return _tooltip(e)
+        if role == self.PathRole:
+            return e.path
+        return None
+
+    # ----- covers -----
+    def request(self, path: str):
+        if path in self._icons or path in self._loading or path in self._failed:
+            return
+        if path not in self._wanted:
+            self._fresh.append(path)
+            if len(self._fresh) == 1:
+                QtCore.QTimer.singleShot(0, self._pump)
+        self._wanted[path] = None
+        self._wanted.move_to_end(path)
+        while len(self._wanted) > 4 * ICON_CACHE_SIZE:
+            self._cached.pop(self._wanted.popitem(last=False)[0], None)
+
+    def request_rows(self, first: int, last: int):
+        for r in range(max(0, first), min(len(self._rows), last + 1)):
+            self.request(self._rows[r].path)
+
+    def cancel_pending(self):
+        """Forget queued covers; results still in flight are ignored."""
+        self._gen += 1
+        self._wanted.clear()
+        self._fresh.clear()
+        self._cached.clear()
+
+    def clear_icons(self):
+        self.cancel_pending()
+        self._icons.clear()
+        self._failed.clear()
+
+    def _pump(self):
+        if self._fresh:
+            # one store read for everything the last repaint/prefetch asked for
+            fresh = [p for p in self._fresh if p in self._wanted]
+            self._fresh.clear()
+            self._cached.update(thumb_store().get_many(fresh, THUMB_W))
+        while self._wanted and len(self._loading) < self._pool.maxThreadCount():
+            path, _ = self._wanted.popitem(last=True)
+            self._loading.add(path)
+            data = self._cached.pop(path, None)
+            self._pool.start(_ThumbTask(self._gen, path, data, self._signals))
+
+    @QtCore.Slot(int, str, QtGui.QImage)
+    def _on_thumb(self, gen: int, path: str, img: QtGui.QImage):
+        self._loading.discard(path)
+        row = self._row_of.get(path)
+        if img.isNull():
+            if gen == self._gen:
+                self._failed.add(path)
+        elif gen == self._gen or row is not None:
+            # a stale result for a row still shown is kept: its repaint was
+            # skipped while the cover was in flight
+            self._icons[path] = QtGui.QIcon(QtGui.QPixmap.fromImage(img))
+            while len(self._icons) > ICON_CACHE_SIZE:
+                self._icons.popitem(last=False)
+            if row is not None:
+                ix = self.index(row)
+                self.dataChanged.emit(ix, ix, [QtCore.Qt.DecorationRole])
+        self._pump()
+
 
 class GalleryView(QtWidgets.QWidget):
     opened = QtCore.Signal(Path)
     changed_dir = QtCore.Signal(Path)
+    _indexed = QtCore.Signal(int, object)   # generation, SearchIndex
 
-    def __init__(self, lib_dir: Path):
+    def __init__(self, lib_dir: Path, load: bool = True):
         super().__init__()
         self.lib_dir = lib_dir
+        self._index: Optional[SearchIndex] = None
+        self._index_gen = 0
+        self._indexed.connect(self._on_indexed)
+        self._search_timer = QtCore.QTimer(self, singleShot=True, interval=SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._run_search)
+        self._reindex_timer = QtCore.QTimer(self, singleShot=True, interval=REINDEX_DELAY_MS)
+        self._reindex_timer.timeout.connect(self._reindex)
         self._build()
-        self.reload()
+        self.catalog = LibraryCatalog(lib_dir, parent=self)
+        self.catalog.changed.connect(self.reload)
+        self.catalog.updated.connect(self._on_updated)
+        self.catalog.ingest.progress.connect(self._on_ingest_progress)
+        self.catalog.ingest.idle.connect(self._on_ingest_idle)
+        if load:
+            self.set_library(lib_dir)
 
     def _build(self):
         v = QtWidgets.QVBoxLayout(self); v.setContentsMargins(12,12,12,12); v.setSpacing(10)
         top = QtWidgets.QHBoxLayout(); v.addLayout(top)
-        self.search = QtWidgets.QLineEdit(); self.search.setPlaceholderText("Search… title or path")
-        self.search.textChanged.connect(self._filter)
+        self.search = QtWidgets.QLineEdit(); self.search.setPlaceholderText("Search… title, author or path")
+        self.search.textChanged.connect(lambda *_: self._search_timer.start())
         top.addWidget(self.search, 1)
+        self.lbl_status = QtWidgets.QLabel(); self.lbl_status.hide()
+        top.addWidget(self.lbl_status)
         self.btn_open = QtWidgets.QPushButton("Choose Library…")
         self.btn_open.clicked.connect(self.choose_library)
         top.addWidget(self.btn_open)
 
-        self.grid = QtWidgets.QListWidget(); v.addWidget(self.grid, 1)
+        self.grid = QtWidgets.QListView(); v.addWidget(self.grid, 1)
         self.grid.setViewMode(QtWidgets.QListView.IconMode)
         self.grid.setResizeMode(QtWidgets.QListView.Adjust)
         self.grid.setMovement(QtWidgets.QListView.Static)
+        self.grid.setLayoutMode(QtWidgets.QListView.Batched)
+        self.grid.setBatchSize(500)
         self.grid.setIconSize(QtCore.QSize(160, 210))
         self.grid.setGridSize(QtCore.QSize(180, 250))
         self.grid.setSpacing(12)
         self.grid.setUniformItemSizes(True)
-        self.grid.itemActivated.connect(self._open)
-        self.grid.itemDoubleClicked.connect(self._open)
+        self.grid.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.model = LibraryModel(self._make_placeholder(), self)
+        self.grid.setModel(self.model)
+        self.grid.activated.connect(self._open)
+        self.grid.doubleClicked.connect(self._open)
+        self.grid.verticalScrollBar().valueChanged.connect(lambda *_: self._prefetch_near_viewport())
+
+    def _make_placeholder(self) -> QtGui.QIcon:
+        sz = self.grid.iconSize()
+        pm = QtGui.QPixmap(int(sz.width() * 0.75), sz.height())
+        pm.fill(QtCore.Qt.transparent)
+        p = QtGui.QPainter(pm)
+        p.setRenderHint(QtGui.QPainter.Antialiasing, True)
+        col = self.palette().mid().color(); col.setAlpha(70)
+        p.setPen(QtCore.Qt.NoPen); p.setBrush(col)
+        p.drawRoundedRect(pm.rect().adjusted(2, 2, -2, -2), 8, 8)
+        p.end()
+        return QtGui.QIcon(pm)
 
     def choose_library(self):
         d = QtWidgets.QFileDialog.getExistingDirectory(self, "Choose PDF Library", str(self.lib_dir))
         if d:
-            self.lib_dir = Path(d)
+            self.set_library(Path(d))
             self.changed_dir.emit(self.lib_dir)
-            self.reload()
+
+    def set_library(self, lib_dir: Path):
+        """Show ``lib_dir`` from its stored catalog, then rescan it in the background."""
+        self.lib_dir = Path(lib_dir)
+        self.model.clear_icons()
+        self.catalog.load(self.lib_dir)
+        self.catalog.rescan()
 
     def reload(self):
-        self.grid.clear()
-        self.lib_dir.mkdir(parents=True, exist_ok=True)
-        pdfs = sorted(self.lib_dir.rglob("*.pdf"))
-        for p in pdfs:
-            doc = PDFDoc(p)
-            icon = doc.cover_thumb()
-            it = QtWidgets.QListWidgetItem(icon, p.stem)
-            it.setData(QtCore.Qt.UserRole, str(p))
-            self.grid.addItem(it)
-
-    def _filter(self, text: str):
-        text = text.lower().strip()
-        for i in range(self.grid.count()):
-            it = self.grid.item(i)
-            show = text in it.text().lower() or text in Path(it.data(QtCore.Qt.UserRole)).name.lower()
-            it.setHidden(not show)
-
-    def _open(self, it: QtWidgets.QListWidgetItem):
-        self.opened.emit(Path(it.data(QtCore.Qt.UserRole)))
+        """Refresh rows from the catalog (no filesystem walk, icons are kept)."""
+        with span("gallery_reload", "gallery"), metrics.timer("gallery.reload_ms"):
+            bar = self.grid.verticalScrollBar().value()
+            entries = self.catalog.sorted_entries()
+            self.model.set_entries(entries, self._matches())
+            self.grid.verticalScrollBar().setValue(bar)
+            self._reindex()
+        metrics.gauge("gallery.entries").set(len(entries))
+
+    def _reindex(self):
+        # the search index is rebuilt off the GUI thread; old one serves meanwhile
+        self._reindex_timer.stop()
+        self._index_gen += 1
+        args = (self._index_gen, self.catalog.sorted_entries(), self.lib_dir)
+        threading.Thread(target=self._build_index, args=args, daemon=True).start()
+
+    @QtCore.Slot(list)
+    def _on_updated(self, entries: list):
+        self.model.update_entries(entries)
+        if not self._reindex_timer.isActive():
+            self._reindex_timer.start()
+
+    @QtCore.Slot(int, int, float)
+    def _on_ingest_progress(self, done: int, total: int, rate: float):
+        self.lbl_status.setText(f"Indexing {done}/{total} · {rate:.0f} files/s")
+        self.lbl_status.show()
+
+    def _on_ingest_idle(self):
+        self.lbl_status.hide()
+        self._reindex()
+
+    def _build_index(self, gen: int, entries: List[Entry], root: Path):
+        with span("build_search_index", "gallery", entries=len(entries)):
+            index = SearchIndex(entries, root)
+        self._indexed.emit(gen, index)
+
+    @QtCore.Slot(int, object)
+    def _on_indexed(self, gen: int, index: SearchIndex):
+        if gen == self._index_gen:
+            self._index = index
+            if self.search.text().strip():
+                self._run_search()
+
+    def cancel_pending(self):
+        self.model.cancel_pending()
+
+    def resume_pending(self):
+        # painting re-requests whatever is visible and still a placeholder
+        self.grid.viewport().update()
+        self._prefetch_near_viewport()
+
+    def _prefetch_near_viewport(self):
+        vp = self.grid.viewport().rect()
+        first = self.grid.indexAt(vp.topLeft() + QtCore.QPoint(4, 4)).row()
+        last = self.grid.indexAt(vp.bottomRight() - QtCore.QPoint(4, 4)).row()
+        if first < 0:
+            return
+        if last < 0:
+            last = self.model.rowCount() - 1
+        self.model.request_rows(last + 1, last + PREFETCH_ROWS)
+
+    def _run_search(self):
+        with span("search", "gallery"):
+            self._search()
+
+    def _search(self):
+        if not self.search.text().strip() or self._index is not None:
+            self.model.show_rows(self._matches())
+
+    def _matches(self) -> Optional[List[Entry]]:
+        """Rows for the current query (None: everything, also while unindexed)."""
+        text = self.search.text()
+        if not text.strip() or self._index is None:
+            return None
+        return self._index.search(text)
+
+    def _open(self, ix: QtCore.QModelIndex):
+        if ix.isValid():
+            self.opened.emit(Path(self.model.path_at(ix.row())))
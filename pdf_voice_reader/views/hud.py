@@ -0,0 +1,78 @@
+from __future__ import annotations
+from PySide6 import QtCore, QtWidgets
+from ..metrics import metrics
+
+REFRESH_MS = 500
+
+# (label, histogram, field) rows shown first; everything else follows
+_HEADLINE = [
+    ("Render / page (ms, p50)", "pdf.render_page_ms", "p50"),
+    ("Render / page (ms, p95)", "pdf.render_page_ms", "p95"),
+    ("Visible pass (ms, p95)", "view.render_visible_ms", "p95"),
+    ("Time to first audio (ms)", "tts.first_audio_ms", "last"),
+    ("Chunk gap (ms, max)", "tts.chunk_gap_ms", "max"),
+    ("Synthesis RTF (p50)", "tts.synth_rtf", "p50"),
+    ("Gallery reload (ms, last)", "gallery.reload_ms", "last"),
+    ("GUI stalls (count)", "gui.stall_ms", "count"),
+    ("GUI stall (ms, max)", "gui.stall_ms", "max"),
+]
+
+
+def _fmt(v) -> str:
+    if v is None:
+        return "–"
+    if isinstance(v, float):
+        return f"{v:.2f}" if abs(v) < 10 else f"{v:.0f}"
+    return str(v)
+
+
+class MetricsDock(QtWidgets.QDockWidget):
+    """Live view of the metrics registry; refreshes only while visible."""
+
+    def __init__(self, parent=None):
+        super().__init__("Performance", parent)
+        self.setObjectName("MetricsDock")
+        w = QtWidgets.QWidget()
+        v = QtWidgets.QVBoxLayout(w); v.setContentsMargins(6, 6, 6, 6)
+        self.table = QtWidgets.QTableWidget(0, 2)
+        self.table.setHorizontalHeaderLabels(["Metric", "Value"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        v.addWidget(self.table, 1)
+        row = QtWidgets.QHBoxLayout(); v.addLayout(row)
+        btn_reset = QtWidgets.QPushButton("Reset")
+        btn_reset.clicked.connect(lambda: (metrics.reset(), self.refresh()))
+        btn_export = QtWidgets.QPushButton("Export JSON…")
+        btn_export.clicked.connect(self.export)
+        row.addStretch(1); row.addWidget(btn_reset); row.addWidget(btn_export)
+        self.setWidget(w)
+        self._timer = QtCore.QTimer(self, interval=REFRESH_MS)
+        self._timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(lambda vis: (self._timer.start(), self.refresh()) if vis else self._timer.stop())
+
+    def _rows(self):
+        snap = metrics.snapshot()
+        hists = snap["histograms"]
+        for label, name, field in _HEADLINE:
+            yield label, (hists.get(name) or {}).get(field)
+        for cache, rate in snap["hit_rates"].items():
+            yield f"{cache} hit rate", None if rate is None else f"{rate:.0%}"
+        for k, v in snap["gauges"].items():
+            yield k, v
+        for k, v in snap["counters"].items():
+            yield k, v
+        for k, h in hists.items():
+            yield f"{k} (n={h['count']}, mean)", h["mean"]
+
+    def refresh(self):
+        rows = list(self._rows())
+        self.table.setRowCount(len(rows))
+        for r, (k, v) in enumerate(rows):
+            self.table.setItem(r, 0, QtWidgets.QTableWidgetItem(k))
+            self.table.setItem(r, 1, QtWidgets.QTableWidgetItem(_fmt(v)))
+
+    def export(self):
+        fn, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export metrics", "metrics.json", "JSON (*.json)")
+        if fn:
+            metrics.export_json(fn)
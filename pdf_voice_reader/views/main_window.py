@@ -1,28 +1,40 @@
 from __future__ import annotations
 from pathlib import Path
 from typing import Optional, List
-import json
+import importlib, threading
 
 from PySide6 import QtCore, QtGui, QtWidgets
-from ..config import APP_NAME, STATE_FILE, DEFAULT_LIB, MIN_SCALE, MAX_SCALE
-from ..util import scan_voice_models, chunk_text
+from ..config import (APP_NAME, DEFAULT_LIB, MIN_SCALE, MAX_SCALE, RENDER_PROCESSES, FOLLOW_AHEAD,
+                      QUEUE_BUILD_PAGES)
+from ..util import scan_voice_models, chunk_text, file_fingerprint
 from ..controller import AppController
+from ..model.chunkindex import ChunkIndex
 from ..model.pdfdoc import PDFDoc
-import json
+from ..model.docpool import DocumentPool
+from ..model.renderfarm import RenderFarm
+from ..model.sessions import Session, SessionStore
+from ..startup import profile
+from ..state import StateStore
+from ..tracing import tracer, traced
 
 from .gallery import GalleryView
 from .pdfview import ContinuousPDFView
+from .hud import MetricsDock
 
 from ..themes import apply_theme, THEME_NAMES, DEFAULT_THEME
 
 
 class MainWindow(QtWidgets.QMainWindow):
+    _voices_found = QtCore.Signal(list)
+    _warmed = QtCore.Signal(str)
+
     def __init__(self):
         super().__init__()
         QtWidgets.QApplication.setApplicationName(APP_NAME)
         self.resize(1480, 940)
 
-        self.state = self._load_state()
+        self.store = StateStore(parent=self)
+        self.state = self.store.data
         self.lib_dir = Path(self.state.get("lib_dir", str(DEFAULT_LIB))).expanduser()
 
         self.controller = AppController()
@@ -30,6 +42,18 @@ class MainWindow(QtWidgets.QMainWindow):
         self.controller.wpm = int(self.state.get("wpm", 170))
 
         self.current_doc: Optional[PDFDoc] = None
+        self.docs = DocumentPool(parent=self)
+        self.sessions = SessionStore()
+        self._doc_fp: Optional[str] = None
+        self._session: Optional[Session] = None
+        self._index: Optional[ChunkIndex] = None   # source of every queued chunk
+        self._index_next = 0                         # next page to chunk onto the queue
+        self._index_end = 0                          # ... and the page the queue stops before
+        self._index_timer = QtCore.QTimer(self, singleShot=True, interval=0)
+        self._index_timer.timeout.connect(self._extend_queue)
+        self._read_page = -1                         # page of the chunk being read aloud
+        self._session_timer = QtCore.QTimer(self, singleShot=True, interval=1000)
+        self._session_timer.timeout.connect(lambda: self._save_session(raster=False))
         self._last_selection: str = ""
         self.current_theme = self.state.get("theme", DEFAULT_THEME)
 
@@ -38,7 +62,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.setCentralWidget(self.stack)
 
         # gallery
-        self.gallery = GalleryView(self.lib_dir)
+        self.gallery = GalleryView(self.lib_dir, load=False)   # filled in finish_startup
         self.stack.addWidget(self.gallery)
 
         # reader page
@@ -64,6 +88,14 @@ class MainWindow(QtWidgets.QMainWindow):
             self.pdf_view.firstVisibleChanged.connect(self.on_first_visible_changed)
         if hasattr(self.pdf_view, "wordClicked"):
             self.pdf_view.wordClicked.connect(self.on_word_clicked)
+        self.pdf_view.zoomChanged.connect(self._on_view_zoomed)
+        self._opening: Optional[tuple] = None   # (path, fingerprint, session) being opened
+        self.docs.opened.connect(self._on_doc_opened)
+        self.docs.openFailed.connect(self._on_open_failed)
+        self.render_farm: Optional[RenderFarm] = None
+        if RENDER_PROCESSES > 0:
+            self.render_farm = RenderFarm(RENDER_PROCESSES, parent=self)
+            self.pdf_view.set_render_farm(self.render_farm)
 
         # docks
         self._build_docks()
@@ -109,6 +141,34 @@ class MainWindow(QtWidgets.QMainWindow):
         # start in gallery
         self.show_gallery()
         self._sync_zoom_label()
+        self._voices_found.connect(lambda voices: self.reload_voices(voices=voices))
+        self._voices_found.connect(lambda *_: self._startup_step("voices"))
+        self._warmed.connect(self._startup_step)
+        QtWidgets.QApplication.instance().aboutToQuit.connect(self._save_session)
+        QtWidgets.QApplication.instance().aboutToQuit.connect(self.docs.close_all)
+        if self.render_farm is not None:
+            QtWidgets.QApplication.instance().aboutToQuit.connect(self.render_farm.shutdown)
+        self._startup_left = {"library", "voices", "fitz import"}
+
+    def finish_startup(self):
+        """Work kept out of the first paint: library, voice scan, MuPDF import."""
+        self.gallery.set_library(self.lib_dir)
+        self._startup_step("library")
+        threading.Thread(target=lambda: self._voices_found.emit(scan_voice_models()), daemon=True).start()
+        threading.Thread(target=self._warm_import, args=("fitz",), daemon=True).start()
+        if self.render_farm is not None:
+            self.render_farm.start()   # workers import MuPDF while the library loads
+
+    def _warm_import(self, name: str):
+        importlib.import_module(name)
+        self._warmed.emit(name + " import")
+
+    def _startup_step(self, phase: str):
+        if phase in self._startup_left:
+            self._startup_left.discard(phase)
+            profile.mark(phase)
+            if not self._startup_left:
+                profile.report()
 
     # ---------------- UI ----------------
     def _build_toolbar(self):
@@ -165,9 +225,23 @@ class MainWindow(QtWidgets.QMainWindow):
         self.act_pause.triggered.connect(self.pause_read)
         self.act_stop = QtGui.QAction("⏹ Stop", self)
         self.act_stop.triggered.connect(self.stop_read)
+        self.act_back = QtGui.QAction("⏪ Sentence", self)
+        self.act_back.setShortcut("Alt+Left")
+        self.act_back.triggered.connect(lambda: self.controller.skip_sentence(-1))
+        self.act_fwd = QtGui.QAction("Sentence ⏩", self)
+        self.act_fwd.setShortcut("Alt+Right")
+        self.act_fwd.triggered.connect(lambda: self.controller.skip_sentence(+1))
+        self.tb.addAction(self.act_back)
         self.tb.addAction(self.act_play)
         self.tb.addAction(self.act_pause)
         self.tb.addAction(self.act_stop)
+        self.tb.addAction(self.act_fwd)
+        self.act_follow = QtGui.QAction("Follow", self)
+        self.act_follow.setCheckable(True)
+        self.act_follow.setChecked(bool(self.state.get("follow", True)))
+        self.act_follow.setToolTip("Keep the page being read aloud in view")
+        self.act_follow.toggled.connect(self.on_follow_toggled)
+        self.tb.addAction(self.act_follow)
 
         self.tb.addSeparator()
 
@@ -242,6 +316,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self.addDockWidget(QtCore.Qt.BottomDockWidgetArea, self.text_dock)
         self.text_dock.setVisible(False)
 
+        # performance HUD
+        self.metrics_dock = MetricsDock(self)
+        self.addDockWidget(QtCore.Qt.RightDockWidgetArea, self.metrics_dock)
+        self.metrics_dock.setVisible(False)
+
         
 
         self.cmb_theme = QtWidgets.QComboBox()
@@ -278,13 +357,20 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.slider_wpm.valueChanged.connect(self.on_wpm_changed)
         self.cmb_voice.currentTextChanged.connect(self.on_voice_changed)
-        self.reload_voices()
+        # voices are scanned after the first paint; keep the saved one meanwhile
+        self.cmb_voice.addItem(self.controller.voice_model or "Scanning voices…")
         return w
 
     # ------------- gallery & file open -------------
     def show_gallery(self):
-        self.gallery.lib_dir = self.lib_dir
-        self.gallery.reload()
+        self.docs.cancel_open()
+        self._opening = None
+        self._save_session()
+        # the catalog and its directory watcher keep the grid current
+        if self.gallery.lib_dir != self.lib_dir:
+            self.gallery.set_library(self.lib_dir)
+        else:
+            self.gallery.resume_pending()
         self.stack.setCurrentWidget(self.gallery)
         self.setWindowTitle(APP_NAME + " — Library")
     
@@ -300,23 +386,87 @@ class MainWindow(QtWidgets.QMainWindow):
         self._save_state()
 
     def show_reader(self):
+        self.gallery.cancel_pending()
         self.stack.setCurrentWidget(self.reader)
         self.setWindowTitle(APP_NAME)
 
     def open_path(self, path: Path):
         try:
-            self.current_doc = PDFDoc(path)
-            self.current_doc.open()
-            self.pdf_view.set_document(self.current_doc)
+            self._save_session()
+            try:
+                fp = file_fingerprint(Path(path))
+            except OSError:
+                fp = None
+            sess = (self.sessions.get(fp) if fp else None) or Session()
+            raster = self.sessions.raster(fp) if fp else None
+            if raster:
+                # last first screen of this book, on screen before it is even opened
+                pm = QtGui.QPixmap()
+                if pm.loadFromData(raster):
+                    pm.setDevicePixelRatio(self.pdf_view.devicePixelRatioF())
+                    self.show_reader()
+                    self.pdf_view.show_preview(pm)
+                    self.pdf_view.viewport().repaint()
+            self._opening = (Path(path), fp, sess)
+            doc = self.docs.open_async(path)
+        except Exception as e:
+            self._opening = None
+            QtWidgets.QMessageBox.critical(self, "Open failed", str(e))
+            return
+        if doc is not None:
+            self._on_doc_opened(doc)
+        else:
+            self.status.showMessage(f"Opening {Path(path).name}…")
+
+    def _on_doc_opened(self, doc: PDFDoc):
+        """Show ``doc`` (opened by open_path) as soon as its first page can be;
+        the rest of its pages are added as the pool reads them."""
+        if self._opening is None or self._opening[0] != doc.path:
+            return
+        path, fp, sess = self._opening
+        self._opening = None
+        try:
+            self.current_doc = doc
+            self._doc_fp, self._session, self._index = fp, sess, None
+            self._index_timer.stop()
+            self._read_page = -1
+            self.pdf_view.scale = sess.zoom
+            self.pdf_view.fit_mode = sess.fit
+            self.act_fit_w.setChecked(sess.fit == "width")
+            self.act_fit_p.setChecked(sess.fit == "page")
+            page = max(0, min(sess.page, self.current_doc.page_count - 1))
+            self.show_reader()   # placeholders are sized for the reader's viewport
+            self.pdf_view.set_document(self.current_doc, page, sess.offset)
+            self.spin_page.blockSignals(True)
             self.spin_page.setMaximum(self.current_doc.page_count)
-            self.spin_page.setValue(1)
-            self.text_edit.setPlainText(self.current_doc.page_text(0))
+            self.spin_page.setValue(page + 1)
+            self.spin_page.blockSignals(False)
+            self._sync_zoom_label()
+            # text after the first paint
+            QtCore.QTimer.singleShot(0, lambda: self._show_page_text(doc, page))
             self.state["last_file"] = str(path)
             self._save_state()
-            self.show_reader()
+            entry = self.gallery.catalog.entries.get(str(path))
+            if entry is not None:
+                self.setWindowTitle(f"{APP_NAME} — {entry.display_title}")
+                if entry.meta.get("has_text") is False:
+                    self.status.showMessage("This PDF has no text layer; there is nothing to read aloud.")
+                    return
+            self.status.showMessage("Ready")
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "Open failed", str(e))
 
+    def _on_open_failed(self, path: str, error: str):
+        if self._opening is not None and str(self._opening[0]) == path:
+            self._opening = None
+            self.pdf_view.hide_preview()
+            self.status.showMessage("Ready")
+            QtWidgets.QMessageBox.critical(self, "Open failed", error)
+
+    def _show_page_text(self, doc: PDFDoc, page: int):
+        if doc is self.current_doc:
+            self.text_edit.setPlainText(doc.page_text(page))
+
     # ------------- page / zoom -------------
     def change_page(self, delta: int):
         if not self.current_doc:
@@ -348,6 +498,11 @@ class MainWindow(QtWidgets.QMainWindow):
             self.pdf_view.set_zoom(new_scale)
         self._sync_zoom_label()
 
+    def _on_view_zoomed(self, scale: float):
+        self.act_fit_w.setChecked(False)
+        self.act_fit_p.setChecked(False)
+        self._sync_zoom_label()
+
     def zoom_step(self, factor: float):
         self.act_fit_w.setChecked(False)
         self.act_fit_p.setChecked(False)
@@ -406,8 +561,9 @@ class MainWindow(QtWidgets.QMainWindow):
         self.reload_voices(select=fn)
         self._save_state()
 
-    def reload_voices(self, select: str | None = None):
-        voices = scan_voice_models()
+    def reload_voices(self, select: str | None = None, voices: Optional[List[str]] = None):
+        if voices is None:
+            voices = scan_voice_models()
         self.cmb_voice.blockSignals(True)
         self.cmb_voice.clear()
         for v in voices:
@@ -429,7 +585,7 @@ class MainWindow(QtWidgets.QMainWindow):
             self._save_state()
 
     def on_wpm_changed(self, val: int):
-        self.controller.wpm = int(val)
+        self.controller.set_wpm(val)
         self.lbl_wpm.setText(str(self.controller.wpm))
         self._save_state()
 
@@ -444,6 +600,7 @@ class MainWindow(QtWidgets.QMainWindow):
             cur.select(QtGui.QTextCursor.Document)
             self.text_edit.setTextCursor(cur)
 
+    @traced("start_read", "gui")
     def start_read(self, mode: str):
         if not self.current_doc or not self.controller.voice_model:
             QtWidgets.QMessageBox.information(
@@ -452,14 +609,12 @@ class MainWindow(QtWidgets.QMainWindow):
             return
 
         chunks: List[str] = []
+        index: Optional[ChunkIndex] = None
         if mode == "page":
-            text = self.current_doc.page_text(self.spin_page.value() - 1)
-            chunks = chunk_text(text)
+            chunks, index = self._queue_from(self.spin_page.value() - 1, whole=False)
 
         elif mode == "from_here":
-            start = self.spin_page.value() - 1
-            for i in range(start, self.current_doc.page_count):
-                chunks.extend(chunk_text(self.current_doc.page_text(i)))
+            chunks, index = self._queue_from(self.spin_page.value() - 1)
 
         elif mode == "selection":
             sel = (self._last_selection or "").strip()
@@ -478,30 +633,97 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.information(self, "Empty", "No text to read.")
             return
 
-        self.controller.start_queue(chunks)
+        self._start_queue(chunks, index)
         self.status.showMessage("Speaking…")
 
+    def _words(self, page: int) -> List[str]:
+        return [w for *_, w in self.current_doc.page_words(page)]
+
+    def _queue_from(self, page: int, word: int = 0, whole: bool = True):
+        """Chunks from ``word`` of ``page`` on and their index. Only pages up
+        to the first with text are chunked here; with ``whole`` the rest of
+        the document is added to the playing queue by _extend_queue,
+        otherwise the queue ends with ``page``."""
+        index = ChunkIndex()
+        chunks = index.add_page(page, self._words(page), word)
+        end = self.current_doc.page_count if whole else page + 1
+        page += 1
+        while not chunks and page < end:
+            chunks = index.add_page(page, self._words(page))
+            page += 1
+        self._index_next, self._index_end = page, end
+        return chunks, index
+
+    def _extend_queue(self):
+        doc, index = self.current_doc, self._index
+        if doc is None or index is None or self._index_next >= self._index_end:
+            return
+        end = min(self._index_end, doc.page_count, self._index_next + QUEUE_BUILD_PAGES)
+        chunks: List[str] = []
+        for i in range(self._index_next, end):
+            chunks += index.add_page(i, self._words(i))
+        self._index_next = end
+        if chunks:
+            self.controller.engine.extend_queue(chunks)
+        self._index_timer.start()
+
     def on_word_clicked(self, page_index: int, word_index: int):
         if not getattr(self, "act_read_from_click", None) or not self.act_read_from_click.isChecked():
             return
         if not self.current_doc:
             return
-        words = self.current_doc.page_words(page_index)
-        if word_index < 0 or word_index >= len(words):
+        if word_index < 0 or word_index >= len(self.current_doc.page_words(page_index)):
             return
-        after = " ".join(w for *_, w in words[max(0, word_index):])
-        chunks = chunk_text(after)
-        for i in range(page_index + 1, self.current_doc.page_count):
-            chunks.extend(chunk_text(self.current_doc.page_text(i)))
-        if not chunks:
-            return
-        self.controller.start_queue(chunks)
+        hit = self._index.chunk_at(page_index, word_index) if self._index else None
+        if hit is not None and self.controller.engine.running:
+            # already queued: jump there, synthesized audio is kept
+            self.controller.seek(*hit)
+        else:
+            chunks, index = self._queue_from(page_index, word_index)
+            if not chunks:
+                return
+            self._start_queue(chunks, index)
         self.status.showMessage(f"Speaking from page {page_index + 1}…")
 
     def resume_read(self):
+        s = self._session
+        if (self._index is None and self.current_doc and s and s.read_page >= 0
+                and self.controller.voice_model):
+            # nothing queued for this book yet: continue where the session left off
+            chunks, index = self._queue_from(s.read_page, s.read_word)
+            if chunks:
+                self._start_queue(chunks, index)
+                self.status.showMessage(f"Speaking from page {s.read_page + 1}…")
+                return
         self.controller.resume()
         self.status.showMessage("Playing")
 
+    def _start_queue(self, chunks: List[str], index: Optional[ChunkIndex], start: int = 0):
+        self._index = index
+        self._read_page = -1
+        self.controller.start_queue(chunks, start)
+        if index is not None:
+            self._index_timer.start()
+            self.on_read_progress(start)
+
+    def on_read_progress(self, chunk: int):
+        """The narration reached ``chunk``: follow it to its page and have
+        the pages after it prepared before the view gets there."""
+        index = self._index
+        if (not self.current_doc or index is None or not 0 <= chunk < len(index)
+                or index.page[chunk] == self._read_page):
+            return
+        page = self._read_page = index.page[chunk]
+        self.pdf_view.prefetch(index.pages_from(chunk, FOLLOW_AHEAD))
+        if self.act_follow.isChecked() and page != self.pdf_view.view_state()[0]:
+            self.pdf_view.go_to_page(page + 1)
+
+    def on_follow_toggled(self, on: bool):
+        self.state["follow"] = on
+        self._save_state()
+        if on and self._read_page >= 0 and self.controller.engine.running:
+            self.pdf_view.go_to_page(self._read_page + 1)
+
     def pause_read(self):
         self.controller.pause()
         self.status.showMessage("Paused")
@@ -513,10 +735,12 @@ class MainWindow(QtWidgets.QMainWindow):
             self.pause_read()
 
     def stop_read(self):
+        self._index_timer.stop()
         self.controller.stop()
         self.status.showMessage("Stopped")
 
     # keep spinner & bottom text synced with scrolling
+    @traced("first_visible_changed", "gui")
     def on_first_visible_changed(self, first_index: int):
         if not self.current_doc:
             return
@@ -527,6 +751,33 @@ class MainWindow(QtWidgets.QMainWindow):
             self.text_edit.setPlainText(self.current_doc.page_text(first_index))
         except Exception:
             pass
+        self._session_timer.start()
+
+    # ------------- per-document session -------------
+    def _save_session(self, raster: bool = True):
+        """Remember where we are in the current document (and, when the reader
+        is on screen, what its first screen looks like)."""
+        self._session_timer.stop()
+        if not self.current_doc or not self._doc_fp:
+            return
+        page, offset = self.pdf_view.view_state()
+        prev = self._session or Session()
+        read_page, read_word = prev.read_page, prev.read_word
+        if self._index:
+            chunk = min(self.controller.position()[0], len(self._index) - 1)
+            read_page, read_word = self._index.source(chunk)
+        s = Session(page, offset, self.pdf_view.scale, self.pdf_view.fit_mode, read_page, read_word)
+        data = None
+        if raster and self.isVisible() and self.stack.currentWidget() is self.reader:
+            buf = QtCore.QBuffer()
+            buf.open(QtCore.QIODevice.WriteOnly)
+            self.pdf_view.first_screen().save(buf, "JPG", 80)
+            data = bytes(buf.data())
+        try:
+            self.sessions.put(self._doc_fp, self.current_doc.path, s, data)
+        except Exception:
+            pass
+        self._session = s
 
     # ------------- theme -------------
     def on_theme_changed(self, name: str):
@@ -535,21 +786,27 @@ class MainWindow(QtWidgets.QMainWindow):
         self._save_state()
 
     # ------------- state -------------
-    def _load_state(self) -> dict:
-        if STATE_FILE.exists():
-            try:
-                return json.loads(STATE_FILE.read_text())
-            except Exception:
-                return {}
-        return {}
-
     def _save_state(self):
-        self.state = getattr(self, "state", {})
+        # coalesced: the store writes once the changes settle, and on exit
         self.state["lib_dir"] = str(self.lib_dir)
         self.state["voice_model"] = self.controller.voice_model
         self.state["wpm"] = self.controller.wpm
         self.state["theme"] = getattr(self, "current_theme", DEFAULT_THEME)
-        STATE_FILE.write_text(json.dumps(self.state, indent=2))
+        self.store.save()
+
+    def on_trace_toggled(self, on: bool):
+        if on:
+            tracer.clear()
+            tracer.start()
+            self.status.showMessage("Recording trace… (Ctrl+Shift+T to stop)")
+            return
+        tracer.stop()
+        fn, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Save trace", "pdf_voice_reader.trace.json", "Trace events (*.json)"
+        )
+        if fn:
+            n = tracer.export(Path(fn))
+            self.status.showMessage(f"Trace saved: {n} events — open it in ui.perfetto.dev")
 
     def _toggle_focus_action(self):
         # keep the QAction’s checked state in sync when pressing F11
@@ -585,6 +842,18 @@ class MainWindow(QtWidgets.QMainWindow):
         self.act_view_text.setText("Extracted Text")
         view.addAction(self.act_view_text)
 
+        self.act_view_metrics = self.metrics_dock.toggleViewAction()
+        self.act_view_metrics.setText("Performance HUD")
+        self.act_view_metrics.setShortcut("Ctrl+Shift+P")
+        view.addAction(self.act_view_metrics)
+
+        self.act_trace = QtGui.QAction("Record Trace", self)
+        self.act_trace.setCheckable(True)
+        self.act_trace.setChecked(tracer.enabled)
+        self.act_trace.setShortcut("Ctrl+Shift+T")
+        self.act_trace.toggled.connect(self.on_trace_toggled)
+        view.addAction(self.act_trace)
+
 
     def toggle_focus(self):
         focus = self.act_focus.isChecked()
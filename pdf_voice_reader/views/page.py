@@ -46,6 +46,8 @@ class PageWidget(QtWidgets.QFrame):
 
         # Current scale used to render this page (for word boxes)
         self.scale_for_words: float = 1.0
+        # last rendered pixmap, stretched while zooming
+        self._source: QtGui.QPixmap | None = None
 
         # Selection state
         self._selection_enabled = False
@@ -63,17 +65,40 @@ class PageWidget(QtWidgets.QFrame):
     def unload(self, scale: float):
         sz = self.placeholder_size(scale)
         self.lbl.clear()
+        self.lbl.setToolTip("")
+        self._source = None
         self.setMinimumHeight(sz.height())
         self.setMaximumHeight(sz.height())
         self.scale_for_words = scale
         self._clear_selection()
 
+    def show_error(self, scale: float, reason: str = ""):
+        """Placeholder-sized page saying it could not be rendered."""
+        self.unload(scale)
+        self.lbl.setText("This page could not be rendered")
+        self.lbl.setToolTip(reason)
+
     def set_pixmap_scaled(self, pm: QtGui.QPixmap, scale_used: float):
         self.setMinimumHeight(0)
         self.setMaximumHeight(16777215)
         self.lbl.setPixmap(pm)
+        self._source = pm
         self.scale_for_words = scale_used
 
+    def show_stretched(self, scale: float):
+        """Stand-in while zooming: the last rendered pixmap resized to ``scale``."""
+        if self._source is None:
+            self.unload(scale)
+            return
+        sz = self.placeholder_size(scale)
+        dpr = self._source.devicePixelRatio()
+        pm = self._source.scaled(sz * dpr, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.FastTransformation)
+        pm.setDevicePixelRatio(dpr)
+        self.setMinimumHeight(sz.height())
+        self.setMaximumHeight(sz.height())
+        self.lbl.setPixmap(pm)
+        self.scale_for_words = scale
+
     def setSelectionEnabled(self, enabled: bool):
         self._selection_enabled = bool(enabled)
         self.setCursor(QtCore.Qt.IBeamCursor if enabled else QtCore.Qt.ArrowCursor)
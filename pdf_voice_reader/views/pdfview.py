@@ -1,9 +1,13 @@
 from __future__ import annotations
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 from PySide6 import QtCore, QtWidgets, QtGui
 
-from ..model.pdfdoc import PDFDoc
-from ..config import MIN_SCALE, MAX_SCALE, WINDOW_SIZE, PRELOAD_MARGIN
+from ..model.pdfdoc import PDFDoc, render_level
+from ..model.renderfarm import RenderFarm
+from ..config import (MIN_SCALE, MAX_SCALE, WINDOW_SIZE, PRELOAD_MARGIN, ZOOM_SETTLE_MS, ZOOM_WHEEL_STEP,
+                      PAGE_BUILD_BATCH)
+from ..metrics import metrics
+from ..tracing import span
 from .page import PageWidget
 
 
@@ -12,11 +16,16 @@ class ContinuousPDFView(QtWidgets.QScrollArea):
     wordClicked = QtCore.Signal(int, int)        # (page_index, word_index)
     textSelected = QtCore.Signal(int, str)       # (page_index, text)
     firstVisibleChanged = QtCore.Signal(int)     # first visible page index (0-based)
+    zoomChanged = QtCore.Signal(float)           # scale set by smooth zoom (e.g. Ctrl+wheel)
 
     def __init__(self):
         super().__init__()
 
         self.doc: Optional[PDFDoc] = None
+        # optional out-of-process renderer; pages then arrive asynchronously
+        self.farm: Optional[RenderFarm] = None
+        # (page, level) the farm gave up on for this document -> reason
+        self._farm_failed: Dict[Tuple[int, float], str] = {}
 
         # scrolling container
         self.container = QtWidgets.QWidget()
@@ -34,6 +43,25 @@ class ContinuousPDFView(QtWidgets.QScrollArea):
         self._select_mode: bool = False
 
         self._last_first_visible: int = 0
+        # (page, fraction) to scroll to once the new document is laid out
+        self._pending_restore: Optional[Tuple[int, float]] = None
+
+        # cached first screen, shown until the real pages are rendered
+        self._preview = QtWidgets.QLabel(self.viewport())
+        self._preview.setAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignTop)
+        self._preview.hide()
+
+        # while zooming, pages on screen are stretched; they are rendered
+        # again once this fires
+        self._zoom_settle = QtCore.QTimer(self, singleShot=True, interval=ZOOM_SETTLE_MS)
+        self._zoom_settle.timeout.connect(self._zoom_settled)
+
+        # page widgets are created a batch per event-loop turn
+        self._build_timer = QtCore.QTimer(self, singleShot=True, interval=0)
+        self._build_timer.timeout.connect(self._build_pages)
+
+        # pages wanted soon wherever the view is (see prefetch)
+        self._prefetch: List[int] = []
 
         # re-render when viewport changes or scrolled
         self.viewport().installEventFilter(self)
@@ -46,16 +74,41 @@ class ContinuousPDFView(QtWidgets.QScrollArea):
 
     # ---------- Public API ----------
 
-    def set_document(self, doc: PDFDoc):
-        """Set the model doc and (re)build page widgets."""
+    def set_document(self, doc: PDFDoc, page: int = 0, offset: float = 0.0):
+        """Set the model doc and (re)build page widgets; the first render is
+        at ``page`` scrolled ``offset`` (fraction of its height) into it.
+        Widgets for all but the first PAGE_BUILD_BATCH pages follow on later
+        event-loop turns; sizes the pool has not read yet are read here."""
         self.doc = doc
-
-        for p in self.pages:
-            p.deleteLater()
+        self._last_first_visible = page
+        self._pending_restore = (page, offset)
+
+        # take old pages (and the trailing stretch) out of the layout now, so
+        # the new pages are laid out from the top before any restore
+        while self.vbox.count():
+            item = self.vbox.takeAt(0)
+            if item.widget() is not None:
+                item.widget().deleteLater()
         self.pages.clear()
         self.loaded.clear()
+        self._prefetch = []
+        self._farm_failed.clear()
+
+        self.vbox.addStretch(1)
+        self._build_pages()
+        QtCore.QTimer.singleShot(0, self._apply_restore)
 
-        for i in range(doc.page_count):
+    def _build_pages(self):
+        doc = self.doc
+        if doc is None or doc.doc is None:
+            return
+        end = min(doc.page_count, len(self.pages) + PAGE_BUILD_BATCH)
+        if end <= len(self.pages):
+            return
+        if doc.sizes_known < end:
+            doc.read_sizes(end - doc.sizes_known)
+        scale = self._scale()
+        for i in range(len(self.pages), end):
             pw = PageWidget(doc, i)
 
             # forward events if PageWidget exposes them
@@ -65,12 +118,79 @@ class ContinuousPDFView(QtWidgets.QScrollArea):
             if hasattr(pw, "setSelectionEnabled"):
                 pw.setSelectionEnabled(self._select_mode)
 
-            self.vbox.addWidget(pw)
+            pw.unload(scale)
+            self.vbox.insertWidget(len(self.pages), pw)   # before the trailing stretch
             self.pages.append(pw)
+            self.loaded[i] = False
+        if end < doc.page_count:
+            self._build_timer.start()
+        # the restore target may exist now, or new pages reach into the window
+        QtCore.QTimer.singleShot(0, self._apply_restore if self._pending_restore else self._render_visible)
+
+    def _apply_restore(self):
+        if self._pending_restore is None or not self.pages:
+            return
+        page, offset = self._pending_restore
+        if len(self.pages) <= page < self.doc.page_count:
+            return   # not built yet; _build_pages calls again
+        self._pending_restore = None
+        self._relayout()
+        w = self.pages[max(0, min(page, len(self.pages) - 1))]
+        self.verticalScrollBar().setValue(w.pos().y() + int(offset * w.height()))
+        self._render_visible()
 
-        self.vbox.addStretch(1)
-        self._refresh_placeholders()
-        QtCore.QTimer.singleShot(0, self._render_visible)
+    def view_state(self) -> Tuple[int, float]:
+        """(first visible page, fraction of it scrolled past)."""
+        if not self.pages:
+            return 0, 0.0
+        if self._pending_restore is not None:
+            return self._pending_restore
+        i = self._find_first_visible_index()
+        w = self.pages[i]
+        off = (self.verticalScrollBar().value() - w.pos().y()) / max(1, w.height())
+        return i, max(0.0, min(1.0, off))
+
+    def show_preview(self, pm: QtGui.QPixmap):
+        """Cover the viewport with ``pm`` until visible pages are rendered."""
+        self._preview.setPixmap(pm)
+        self._preview.setGeometry(self.viewport().rect())
+        self._preview.show()
+        self._preview.raise_()
+
+    def hide_preview(self):
+        self._preview.hide()
+        self._preview.clear()
+
+    def first_screen(self) -> QtGui.QPixmap:
+        return self.viewport().grab()
+
+    def set_render_farm(self, farm: RenderFarm):
+        self.farm = farm
+        farm.rendered.connect(self._on_farm_rendered)
+        farm.failed.connect(self._on_farm_failed)
+
+    def _on_farm_rendered(self, path: str, page: int, level: float, img: QtGui.QImage):
+        if self.doc is None or str(self.doc.path) != path:
+            return
+        self.doc.add_raster(page, level, img)
+        if not self.loaded.get(page):
+            self._render_visible()
+
+    def _on_farm_failed(self, path: str, page: int, level: float, reason: str):
+        # not requested again: the page is shown as an error instead
+        if self.doc is None or str(self.doc.path) != path:
+            return
+        self._farm_failed[(page, level)] = reason
+        if not self.loaded.get(page):
+            self._render_visible()
+
+    def prefetch(self, pages: List[int]):
+        """Have ``pages`` rasterized at the current scale and their text
+        extracted ahead of time (e.g. where the narration goes next), a page
+        per event-loop turn; replaces the previous list."""
+        self._prefetch = [i for i in pages if self.doc and 0 <= i < self.doc.page_count]
+        if self._prefetch:
+            QtCore.QTimer.singleShot(0, self._render_visible)
 
     def set_fit_mode(self, mode: Optional[str]):
         """'width', 'page', or None (free zoom)."""
@@ -85,10 +205,59 @@ class ContinuousPDFView(QtWidgets.QScrollArea):
         self._refresh_placeholders()
         self._render_visible()
 
+    def smooth_zoom_to(self, scale: float, anchor: Optional[QtCore.QPoint] = None):
+        """Zoom to ``scale`` at once by stretching the pixmaps on screen,
+        keeping the point under ``anchor`` (default: the cursor if it is over
+        the view, else the centre) in place. Nothing is rendered until
+        zooming has paused for ZOOM_SETTLE_MS."""
+        scale = max(MIN_SCALE, min(MAX_SCALE, float(scale)))
+        if not self.doc or not self.pages or self._pending_restore is not None:
+            self.set_zoom(scale)
+            return
+        vp, vsb, hsb = self.viewport(), self.verticalScrollBar(), self.horizontalScrollBar()
+        if anchor is None:
+            anchor = vp.mapFromGlobal(QtGui.QCursor.pos())
+            if not vp.rect().contains(anchor):
+                anchor = vp.rect().center()
+        # the anchor as a page, a fraction of its height and an offset from
+        # its (centred) pixmap's middle
+        top, bottom = vsb.value(), vsb.value() + vp.height()
+        y, x = top + anchor.y(), hsb.value() + anchor.x()
+        i = self._find_first_visible_index()
+        while i + 1 < len(self.pages) and self.pages[i + 1].pos().y() <= y:
+            i += 1
+        w = self.pages[i]
+        fy = (y - w.pos().y()) / max(1, w.height())
+        dx = (x - w.pos().x() - w.width() / 2) * scale / max(1e-6, w.scale_for_words)
+
+        on_screen = [k for k, pw in enumerate(self.pages)
+                     if self.loaded.get(k) and pw.pos().y() < bottom and pw.pos().y() + pw.height() > top]
+        self.scale, self.fit_mode = scale, None
+        self._zoom_settle.start()
+        for k, pw in enumerate(self.pages):
+            if k in on_screen:
+                pw.show_stretched(scale)
+            else:
+                pw.unload(scale)
+                self.loaded[k] = False
+        self._relayout()
+        vsb.setValue(round(w.pos().y() + fy * w.height() - anchor.y()))
+        hsb.setValue(round(w.pos().x() + w.width() / 2 + dx - anchor.x()))
+        self.zoomChanged.emit(scale)
+
+    def _zoom_settled(self):
+        # stretched pages stay on screen until their new rasters replace them
+        for k in self.loaded:
+            self.loaded[k] = False
+        self._render_visible()
+
     def go_to_page(self, page_no: int):
         """Scroll to 1-based page number."""
         if not self.pages:
             return
+        if len(self.pages) < page_no <= self.doc.page_count:
+            self._pending_restore = (page_no - 1, 0.0)   # still being built
+            return
         page_no = max(1, min(page_no, len(self.pages)))
         w = self.pages[page_no - 1]
         self.verticalScrollBar().setValue(w.pos().y())
@@ -107,6 +276,12 @@ class ContinuousPDFView(QtWidgets.QScrollArea):
     # ---------- Events ----------
 
     def eventFilter(self, obj, ev):
+        if (obj is self.viewport() and ev.type() == QtCore.QEvent.Wheel
+                and ev.modifiers() & QtCore.Qt.ControlModifier and self.doc):
+            notches = ev.angleDelta().y() / 120
+            if notches:
+                self.smooth_zoom_to(self._scale() * ZOOM_WHEEL_STEP ** notches, ev.position().toPoint())
+            return True
         if obj is self.viewport() and ev.type() in (
             QtCore.QEvent.Resize,
             QtCore.QEvent.Paint,
@@ -118,25 +293,57 @@ class ContinuousPDFView(QtWidgets.QScrollArea):
 
     # ---------- Internal helpers ----------
 
-    def _current_scale_for(self, base_pm: QtGui.QPixmap) -> float:
+    def _current_scale_for(self, base_w: float, base_h: float) -> float:
         s = self.scale
         vr = self.viewport().rect()
         if self.fit_mode == "width":
-            if base_pm.width() > 0:
-                s = (vr.width() - 60) / base_pm.width()
+            if base_w > 0:
+                s = (vr.width() - 60) / base_w
         elif self.fit_mode == "page":
-            if base_pm.width() > 0 and base_pm.height() > 0:
+            if base_w > 0 and base_h > 0:
                 s = min(
-                    (vr.width() - 60) / base_pm.width(),
-                    (vr.height() - 60) / base_pm.height(),
+                    (vr.width() - 60) / base_w,
+                    (vr.height() - 60) / base_h,
                 )
         return max(MIN_SCALE, min(MAX_SCALE, s))
 
+    def _scale(self) -> float:
+        # page 0 at 100% sets the fit scale (as its rendered pixmap did);
+        # its geometry is enough, no need to render it
+        w, h = self.doc.page_size(0)
+        return self._current_scale_for(round(w), round(h))
+
+    def _relayout(self):
+        # size the container for the pages now rather than on the next layout
+        # pass, so page positions and the scroll range are already current
+        c = self.container
+        c.resize(max(self.viewport().width(), c.minimumSizeHint().width()),
+                 max(self.viewport().height(), c.sizeHint().height()))
+        c.layout().activate()
+
+    def _load_page(self, i: int, scale: float, dpr: float, urgent: bool = False) -> bool:
+        """Show page ``i``; True if it is now loaded. With a render farm only
+        cached rasters are used here, the rest is requested from the farm."""
+        if self.farm is None:
+            pm = self.doc.render_page(i, scale, dpr)
+        else:
+            pm = self.doc.cached_page(i, scale, dpr, count=False)   # the farm counts its renders
+            if pm is None:
+                level = render_level(scale * dpr)
+                if (i, level) in self._farm_failed:
+                    self.pages[i].show_error(scale, self._farm_failed[(i, level)])
+                    self.loaded[i] = True
+                    return True
+                self.farm.request(str(self.doc.path), i, level, urgent)
+                return False
+        self.pages[i].set_pixmap_scaled(pm, scale)
+        self.loaded[i] = True
+        return True
+
     def _refresh_placeholders(self):
         if not self.doc or not self.pages:
             return
-        base = self.doc.render_page(0, 1.0)
-        scale = self._current_scale_for(base)
+        scale = self._scale()
         for pw in self.pages:
             pw.unload(scale)
             self.loaded[pw.page_index] = False
@@ -152,11 +359,17 @@ class ContinuousPDFView(QtWidgets.QScrollArea):
         return 0
 
     def _render_visible(self):
-        if not self.doc or not self.pages:
+        if (not self.doc or not self.pages or self._pending_restore is not None
+                or self._zoom_settle.isActive()):
             return
+        with span("render_visible", "view"), metrics.timer("view.render_visible_ms"):
+            self._render_window()
+        metrics.gauge("view.pages_loaded").set(sum(1 for v in self.loaded.values() if v))
+
+    def _render_window(self):
 
-        base = self.doc.render_page(0, 1.0)
-        scale = self._current_scale_for(base)
+        scale = self._scale()
+        dpr = self.devicePixelRatioF()
         first = self._find_first_visible_index()
 
         # emit firstVisibleChanged when it actually changes
@@ -168,16 +381,50 @@ class ContinuousPDFView(QtWidgets.QScrollArea):
         start = max(0, first - PRELOAD_MARGIN)
         end = min(len(self.pages) - 1, start + WINDOW_SIZE - 1 + PRELOAD_MARGIN * 2)
 
-        # load in-window pages
-        for i in range(start, end + 1):
+        # pages on screen first; if any had to be rendered, the rest of the
+        # window follows on the next event-loop turn so they show up sooner
+        bottom = self.verticalScrollBar().value() + self.viewport().height()
+        last = first
+        while last + 1 < len(self.pages) and self.pages[last + 1].pos().y() < bottom:
+            last += 1
+        if self.farm is not None:
+            self.farm.cancel()   # only what this pass asks for is still wanted
+        rendered = False
+        for i in range(first, min(last, end) + 1):
             if not self.loaded.get(i):
-                pm = self.doc.render_page(i, scale)
-                self.pages[i].set_pixmap_scaled(pm, scale)
-                self.loaded[i] = True
+                rendered = self._load_page(i, scale, dpr, urgent=True) or rendered
+        if self._preview.isVisible() and all(self.loaded.get(i) for i in range(first, min(last, end) + 1)):
+            self.hide_preview()
+        rest = [i for i in range(start, end + 1) if not self.loaded.get(i)]
+        if rendered and rest and self.farm is None:
+            QtCore.QTimer.singleShot(0, self._render_visible)
+        else:
+            for i in rest:
+                self._load_page(i, scale, dpr)
 
         # unload outside pages
         for i in list(self.loaded.keys()):
             if self.loaded.get(i) and (i < start or i > end):
                 self.pages[i].unload(scale)
                 self.loaded[i] = False
+
+        if self._prefetch and not rendered:
+            self._prefetch_one(start, end, scale, dpr)
+
+    def _prefetch_one(self, start: int, end: int, scale: float, dpr: float):
+        i = self._prefetch[0]
+        if not start <= i <= end and not self.doc.has_raster(i, scale, dpr):
+            if self.farm is None:
+                self.doc.render_page(i, scale, dpr)
+            else:
+                level = render_level(scale * dpr)
+                if (i, level) not in self._farm_failed:   # a failed one is not retried in-process
+                    # _on_farm_rendered / _on_farm_failed bring us back
+                    self.farm.request(str(self.doc.path), i, level)
+                    return
+        self.doc.page_text(i)
+        self.doc.page_words(i)
+        self._prefetch.pop(0)
+        if self._prefetch:
+            QtCore.QTimer.singleShot(0, self._render_visible)
     
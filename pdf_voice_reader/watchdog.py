@@ -0,0 +1,140 @@
+"""Detects GUI event-loop stalls and records where the GUI thread was stuck.
+
+A timer on the GUI thread stamps a heartbeat; a watchdog thread samples the
+GUI thread's Python stack while the heartbeat is older than the threshold.
+Each stall is attributed to the innermost frame in this package (falling
+back to the innermost frame overall), logged, and added to a ranked report.
+"""
+from __future__ import annotations
+import logging, os, sys, threading, time, traceback
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from PySide6 import QtCore
+from .config import STALL_THRESHOLD_MS
+from .metrics import metrics
+
+log = logging.getLogger(__name__)
+
+STALL_ENV = "PDF_VOICE_READER_STALL_MS"   # overrides the threshold; 0 disables
+_PKG_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@dataclass
+class Stall:
+    started: float
+    duration_ms: float = 0.0
+    source: str = "?"
+    stack: List[str] = field(default_factory=list)   # formatted, outermost first
+    samples: int = 0
+
+
+@dataclass
+class SourceStats:
+    source: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+
+def _source_of(frames: traceback.StackSummary) -> str:
+    for fr in reversed(frames):
+        if os.path.abspath(fr.filename).startswith(_PKG_DIR):
+            rel = os.path.relpath(fr.filename, os.path.dirname(_PKG_DIR))
+            return f"{rel}:{fr.name}"
+    fr = frames[-1] if frames else None
+    return f"{os.path.basename(fr.filename)}:{fr.name}" if fr else "?"
+
+
+class StallWatchdog(QtCore.QObject):
+    def __init__(self, threshold_ms: Optional[int] = None, parent=None):
+        super().__init__(parent)
+        if threshold_ms is None:
+            threshold_ms = int(os.environ.get(STALL_ENV, STALL_THRESHOLD_MS))
+        self.threshold = threshold_ms / 1000.0
+        self.stalls: List[Stall] = []
+        self._lock = threading.Lock()
+        self._gui_tid = threading.get_ident()
+        self._beat = time.monotonic()
+        self._quit = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._timer = QtCore.QTimer(self, interval=max(10, threshold_ms // 4))
+        self._timer.timeout.connect(self._heartbeat)
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def start(self) -> None:
+        if not self.enabled or self._thread:
+            return
+        self._beat = time.monotonic()
+        self._timer.start()
+        self._quit.clear()
+        self._thread = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._timer.stop()
+        self._quit.set()
+        self._thread = None
+
+    def _heartbeat(self) -> None:
+        self._beat = time.monotonic()
+
+    def _watch(self) -> None:
+        poll = self.threshold / 4
+        stall: Optional[Stall] = None
+        sources: Counter = Counter()
+        stacks: Dict[str, List[str]] = {}
+        while not self._quit.wait(poll):
+            beat = self._beat
+            lag = time.monotonic() - beat
+            if lag > self.threshold:
+                frame = sys._current_frames().get(self._gui_tid)
+                if frame is None:
+                    continue
+                frames = traceback.extract_stack(frame)
+                if stall is None or stall.started != beat:
+                    if stall is not None:
+                        self._finish(stall, sources, stacks)
+                    stall, sources, stacks = Stall(started=beat), Counter(), {}
+                src = _source_of(frames)
+                sources[src] += 1
+                stacks.setdefault(src, traceback.format_list(frames))
+                stall.samples += 1
+                stall.duration_ms = lag * 1000.0
+            elif stall is not None:
+                # the loop ticked again: the stall lasted until that beat
+                stall.duration_ms = (beat - stall.started) * 1000.0
+                self._finish(stall, sources, stacks)
+                stall = None
+
+    def _finish(self, stall: Stall, sources: Counter, stacks: Dict[str, List[str]]) -> None:
+        # the most sampled source is where the time went
+        stall.source = sources.most_common(1)[0][0] if sources else "?"
+        stall.stack = stacks.get(stall.source, [])
+        with self._lock:
+            self.stalls.append(stall)
+        metrics.histogram("gui.stall_ms").observe(stall.duration_ms)
+        log.warning("GUI stalled %.0f ms in %s\n%s", stall.duration_ms, stall.source, "".join(stall.stack[-8:]))
+
+    def ranked(self) -> List[SourceStats]:
+        """Stall sources by total blocked time, worst first."""
+        by: Dict[str, SourceStats] = {}
+        with self._lock:
+            for s in self.stalls:
+                st = by.setdefault(s.source, SourceStats(s.source))
+                st.count += 1
+                st.total_ms += s.duration_ms
+                st.max_ms = max(st.max_ms, s.duration_ms)
+        return sorted(by.values(), key=lambda st: st.total_ms, reverse=True)
+
+    def report(self) -> str:
+        rows = self.ranked()
+        if not rows:
+            return "no GUI stalls over %.0f ms" % (self.threshold * 1000)
+        lines = [f"GUI stalls over {self.threshold * 1000:.0f} ms, by total time:"]
+        for st in rows:
+            lines.append(f"  {st.total_ms:9.0f} ms  {st.count:4d}x  max {st.max_ms:7.0f} ms  {st.source}")
+        return "\n".join(lines)
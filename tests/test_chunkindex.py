@@ -0,0 +1,74 @@
+import random
+import pytest
+from pdf_voice_reader.model.chunkindex import ChunkIndex
+from pdf_voice_reader.util import chunk_text, chunk_words
+
+_WORDS = "the reader. voice page! chapter margin sentence? paragraph library render".split()
+
+
+def _words(rng: random.Random, n: int):
+    return [rng.choice(_WORDS) for _ in range(n)]
+
+
+def _index(pages):
+    ix = ChunkIndex()
+    chunks = []
+    for page, (words, start) in pages.items():
+        chunks += ix.add_page(page, words, start, target_len=60)
+    return ix, chunks
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_chunk_words_matches_chunk_text(seed):
+    rng = random.Random(seed)
+    words = _words(rng, rng.randrange(0, 300))
+    target = rng.choice((20, 60, 420))
+    spans = chunk_words(words, target)
+    assert [" ".join(words[a:b + 1]) for a, b in spans] == chunk_text(" ".join(words), target)
+
+
+def test_chunks_round_trip_to_page_and_word():
+    rng = random.Random(1)
+    pages = {0: (_words(rng, 80), 0), 2: (_words(rng, 50), 0), 3: (_words(rng, 120), 17)}
+    ix, chunks = _index(pages)
+    assert len(ix) == len(chunks)
+    for k, text in enumerate(chunks):
+        for j, w in enumerate(text.split(" ")):
+            page, word = ix.source(k, j)
+            assert pages[page][0][word] == w
+            assert ix.chunk_at(page, word) == (k, j)
+
+
+def test_every_queued_word_maps_to_a_chunk():
+    rng = random.Random(2)
+    pages = {1: (_words(rng, 90), 0), 4: (_words(rng, 40), 5)}
+    ix, chunks = _index(pages)
+    for page, (words, start) in pages.items():
+        for word in range(start, len(words)):
+            k, j = ix.chunk_at(page, word)
+            assert ix.source(k, j) == (page, word)
+
+
+def test_unqueued_words_have_no_chunk():
+    rng = random.Random(3)
+    ix, _ = _index({2: (_words(rng, 30), 10)})
+    assert ix.chunk_at(2, 9) is None
+    assert ix.chunk_at(2, 30) is None
+    assert ix.chunk_at(1, 0) is None
+    assert ix.chunk_at(3, 0) is None
+
+
+def test_pages_must_be_added_in_order():
+    ix = ChunkIndex()
+    ix.add_page(3, ["a."])
+    with pytest.raises(ValueError):
+        ix.add_page(3, ["b."])
+
+
+def test_pages_from():
+    rng = random.Random(4)
+    ix, _ = _index({0: (_words(rng, 80), 0), 2: ([], 0), 5: (_words(rng, 80), 0), 6: (_words(rng, 10), 0)})
+    last0 = ix.chunk_at(5, 0)[0] - 1
+    assert ix.pages_from(0, 2) == [0, 5, 6]
+    assert ix.pages_from(last0) == [0]
+    assert ix.pages_from(len(ix) - 1, 3) == [6]
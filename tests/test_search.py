@@ -0,0 +1,46 @@
+from pathlib import Path
+from pdf_voice_reader.model.library import Entry
+from pdf_voice_reader.model.search import SearchIndex
+
+ROOT = Path("/lib")
+
+
+def _index(*names: str, **titles: str) -> SearchIndex:
+    entries = [Entry(f"/lib/{n}.pdf", 1, 1, title=titles.get(n, "")) for n in names]
+    return SearchIndex(entries, ROOT)
+
+
+def _names(result):
+    return [Path(e.path).stem for e in result]
+
+
+def test_empty_query_shows_everything():
+    assert _index("a").search("  ") is None
+
+
+def test_prefix_matches_rank_exact_tokens_first():
+    ix = _index("books", "book", "bookkeeping")
+    assert _names(ix.search("book")) == ["book", "bookkeeping", "books"]
+
+
+def test_infix_matches_words_containing_the_term():
+    ix = _index("notebook", "cookbook", "report")
+    assert _names(ix.search("book")) == ["cookbook", "notebook"]
+    assert _names(ix.search("ebo")) == ["notebook"]
+
+
+def test_prefix_hits_rank_above_infix_hits():
+    ix = _index("notebook", "bookmarks")
+    assert _names(ix.search("book")) == ["bookmarks", "notebook"]
+
+
+def test_fuzzy_fallback_only_without_prefix_or_infix_hits():
+    ix = _index("notebook", "network")
+    assert _names(ix.search("notebok")) == ["notebook"]
+    assert ix.search("zzzz") == []
+
+
+def test_all_terms_must_match_and_title_outranks_path():
+    ix = _index("a", "b", "c", a="Deep Learning", b="Learning to Read")
+    assert _names(ix.search("learn read")) == ["b"]
+    assert _names(ix.search("learning")) == ["a", "b"]